@@ -1,24 +1,29 @@
-import requests
 from bs4 import BeautifulSoup
 from abc import ABC, abstractmethod
 from typing import Dict, Any
-import time
-import random
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.http_session import create_session
+from utils.rate_limiter import TokenBucket
 
 class BaseScraper(ABC):
-    def __init__(self, delay_range=(1, 3)):
-        self.session = requests.Session()
-        self.delay_range = delay_range
+    def __init__(self, requests_per_second=0.5):
+        self.session = create_session()
+        self.requests_per_second = requests_per_second
+        self.rate_limiter = TokenBucket(requests_per_second)
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         })
     
     def get_page(self, url: str) -> BeautifulSoup:
         """Fetch and parse a webpage"""
-        time.sleep(random.uniform(*self.delay_range))
-        response = self.session.get(url)
+        # 429 responses are retried by the session's Retry policy, which waits
+        # for the server's Retry-After header
+        self.rate_limiter.acquire()
+        response = self.session.get(url, timeout=10)
         response.raise_for_status()
-        return BeautifulSoup(response.content, 'html.parser')
+        return BeautifulSoup(response.content, 'lxml')
     
     @abstractmethod
     def scrape(self) -> Dict[str, Any]:
@@ -4,7 +4,6 @@ Bluesky Financial Data Scraper
 Scrapes financial posts from Bluesky public feeds
 """
 
-import requests
 import pandas as pd
 from datetime import datetime, timedelta
 import os
@@ -12,11 +11,15 @@ import sys
 from typing import List, Dict
 import re
 import json
+import base64
+import time
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from utils.s3_uploader import S3Uploader
 from utils.deduplicator import DataDeduplicator
+from utils.http_session import create_session, parse_json
+from utils.memory_optimizer import optimize_memory
 from dotenv import load_dotenv
-import time
+from concurrent.futures import ThreadPoolExecutor
 
 load_dotenv()
 
@@ -25,9 +28,14 @@ class BlueskyScraper:
         self.s3_uploader = S3Uploader()
         self.deduplicator = DataDeduplicator()
         self.base_url = "https://bsky.social/xrpc"
+        self.session = create_session()
         self.access_token = None
         self.refresh_token = None
         
+        # Tokens are cached between runs (accessJwt ~2h, refreshJwt ~2 months)
+        self.token_cache_path = os.path.expanduser('~/.bluesky_cache.json')
+        self.load_cached_tokens()
+        
         # Financial keywords to search for
         self.financial_keywords = [
             'bitcoin', 'btc', 'ethereum', 'eth', 'crypto', 'cryptocurrency',
@@ -35,6 +43,13 @@ class BlueskyScraper:
             'bull market', 'bear market', 'recession', 'inflation',
             'fed', 'federal reserve', 'interest rates', 'sp500', 'nasdaq'
         ]
+        # Single compiled pattern so each post is scanned once for all keywords.
+        # Keywords must start a word ('eth' no longer matches 'method') but may
+        # continue it, so plurals like 'recessions' still count (as in reddit_scraper)
+        self._kw_re = re.compile(
+            r'\b(?:' + '|'.join(re.escape(k) for k in self.financial_keywords) + ')',
+            re.IGNORECASE
+        )
         
         # Key financial accounts to follow (will need to find their DIDs)
         self.financial_accounts = [
@@ -42,8 +57,71 @@ class BlueskyScraper:
             # Format: {'handle': 'username.bsky.social', 'did': 'did:plc:...'}
         ]
     
+    def load_cached_tokens(self):
+        """Load access/refresh tokens saved by a previous run"""
+        try:
+            with open(self.token_cache_path) as f:
+                cached = json.load(f)
+            self.access_token = cached.get('accessJwt')
+            self.refresh_token = cached.get('refreshJwt')
+        except (OSError, ValueError):
+            pass
+    
+    def save_cached_tokens(self):
+        """Atomically write current tokens to the cache file (owner read/write only)"""
+        try:
+            tmp_path = f"{self.token_cache_path}.tmp"
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'accessJwt': self.access_token, 'refreshJwt': self.refresh_token}, f)
+            os.replace(tmp_path, self.token_cache_path)
+        except OSError as e:
+            print(f"Could not cache Bluesky tokens: {e}")
+    
+    @staticmethod
+    def token_seconds_left(token):
+        """Seconds until a JWT's exp claim, decoded locally without a server call"""
+        if not token:
+            return 0
+        try:
+            payload = token.split('.')[1]
+            payload += '=' * (-len(payload) % 4)
+            claims = json.loads(base64.urlsafe_b64decode(payload))
+            return claims['exp'] - time.time()
+        except (IndexError, KeyError, ValueError):
+            return 0
+    
+    def refresh_session(self):
+        """Exchange the refresh token for a new access token"""
+        try:
+            url = f"{self.base_url}/com.atproto.server.refreshSession"
+            headers = {'Authorization': f'Bearer {self.refresh_token}'}
+            
+            response = self.session.post(url, headers=headers, timeout=10)
+            if response.status_code == 200:
+                session_data = parse_json(response)
+                self.access_token = session_data.get('accessJwt')
+                self.refresh_token = session_data.get('refreshJwt')
+                self.save_cached_tokens()
+                print("Bluesky session refreshed")
+                return True
+            else:
+                print(f"Bluesky session refresh failed: {response.text}")
+                return False
+                
+        except Exception as e:
+            print(f"Error refreshing Bluesky session: {e}")
+            return False
+    
     def authenticate(self):
-        """Authenticate with Bluesky using credentials"""
+        """Authenticate with Bluesky, reusing cached tokens when still valid"""
+        # Cached access token with more than 5 minutes left - no network call needed
+        if self.token_seconds_left(self.access_token) > 300:
+            return True
+        
+        if self.token_seconds_left(self.refresh_token) > 0 and self.refresh_session():
+            return True
+        
         try:
             username = os.getenv('BLUESKY_USERNAME')  # your.handle.bsky.social
             password = os.getenv('BLUESKY_APP_PASSWORD')  # app password from settings
@@ -59,11 +137,12 @@ class BlueskyScraper:
                 'password': password
             }
             
-            response = requests.post(url, json=data)
+            response = self.session.post(url, json=data, timeout=10)
             if response.status_code == 200:
-                session_data = response.json()
+                session_data = parse_json(response)
                 self.access_token = session_data.get('accessJwt')
                 self.refresh_token = session_data.get('refreshJwt')
+                self.save_cached_tokens()
                 print("Bluesky authentication successful")
                 return True
             else:
@@ -94,9 +173,10 @@ class BlueskyScraper:
                 'sort': 'latest'
             }
             
-            response = requests.get(url, headers=headers, params=params)
+            response = self.session.get(url, headers=headers, params=params, timeout=10)
             if response.status_code == 200:
-                data = response.json()
+                data = parse_json(response)
+                scraped_at = datetime.utcnow()
                 
                 for post in data.get('posts', []):
                     record = post.get('record', {})
@@ -115,8 +195,8 @@ class BlueskyScraper:
                         'query': query,
                         'platform': 'bluesky',
                         'category': 'SOCIAL_MEDIA',
-                        'scraped_at': datetime.utcnow(),
-                        'timestamp': datetime.utcnow()  # Add timestamp for consistency
+                        'scraped_at': scraped_at,
+                        'timestamp': scraped_at  # Add timestamp for consistency
                     }
                     posts.append(post_data)
             else:
@@ -139,23 +219,24 @@ class BlueskyScraper:
                 'algorithm': 'reverse-chronological'
             }
             
-            response = requests.get(url, params=params)
+            response = self.session.get(url, params=params, timeout=10)
             if response.status_code == 200:
-                data = response.json()
+                data = parse_json(response)
+                scraped_at = datetime.utcnow()
                 
                 for item in data.get('feed', []):
                     post = item.get('post', {})
                     record = post.get('record', {})
                     author = post.get('author', {})
-                    text = record.get('text', '').lower()
+                    text = record.get('text', '')
                     
                     # Filter for financial content
-                    if any(keyword in text for keyword in self.financial_keywords):
+                    if self._kw_re.search(text):
                         post_data = {
                             'id': post.get('uri', '').split('/')[-1],
                             'author_handle': author.get('handle', ''),
                             'author_display_name': author.get('displayName', ''),
-                            'text': record.get('text', ''),
+                            'text': text,
                             'created_at': record.get('createdAt', ''),
                             'reply_count': post.get('replyCount', 0),
                             'repost_count': post.get('repostCount', 0),
@@ -164,8 +245,8 @@ class BlueskyScraper:
                             'query': 'trending_financial',
                             'platform': 'bluesky',
                             'category': 'SOCIAL_MEDIA',
-                            'scraped_at': datetime.utcnow(),
-                            'timestamp': datetime.utcnow()  # Add timestamp for consistency
+                            'scraped_at': scraped_at,
+                            'timestamp': scraped_at  # Add timestamp for consistency
                         }
                         posts.append(post_data)
                         
@@ -176,8 +257,6 @@ class BlueskyScraper:
     
     def scrape_financial_content(self) -> pd.DataFrame:
         """Scrape financial content from Bluesky using authenticated search"""
-        all_posts = []
-        
         # Authenticate first
         if not self.authenticate():
             print("Failed to authenticate with Bluesky")
@@ -188,23 +267,27 @@ class BlueskyScraper:
         # Search for financial keywords
         keywords = ['bitcoin', 'crypto', 'stocks', 'trading', 'investing']
         
-        for keyword in keywords:
-            print(f"Searching for: {keyword}")
-            posts = self.search_posts(keyword, 50)
-            all_posts.extend(posts)
-            
-            # Rate limiting - 3000/hour = 50/minute
-            time.sleep(2)  # 2 seconds between requests
-        
-        # Remove duplicates based on URI
-        seen_uris = set()
-        unique_posts = []
-        for post in all_posts:
-            if post['uri'] not in seen_uris:
-                seen_uris.add(post['uri'])
-                unique_posts.append(post)
-        
-        df = pd.DataFrame(unique_posts)
+        # One request per keyword is well inside the 3000/hour rate limit,
+        # so run the searches concurrently instead of pacing them
+        print(f"Searching for: {', '.join(keywords)}")
+        all_posts = []
+        with ThreadPoolExecutor(max_workers=len(keywords)) as executor:
+            for posts in executor.map(lambda keyword: self.search_posts(keyword, 50), keywords):
+                all_posts.extend(posts)
+        
+        # Remove duplicates based on URI in a single vectorized pass
+        df = pd.DataFrame(all_posts)
+        if not df.empty:
+            df = df.drop_duplicates(subset='uri', keep='first').reset_index(drop=True)
+        
+        df = optimize_memory(df, dtypes={
+            'reply_count': 'uint32',
+            'repost_count': 'uint32',
+            'like_count': 'uint32',
+            'platform': 'category',
+            'category': 'category',
+            'query': 'category'
+        })
         print(f"Scraped {len(df)} unique Bluesky financial posts")
         
         return df
@@ -228,10 +311,10 @@ class BlueskyScraper:
             
             # Generate filename with timestamp
             timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
-            filename = f"bluesky_financial_{timestamp}.csv"
+            filename = f"bluesky_financial_{timestamp}.parquet"
             
             # Upload to S3
-            success = self.s3_uploader.upload_dataframe(df, filename)
+            success = self.s3_uploader.upload_parquet(df, filename)
             
             if success:
                 print(f"Successfully uploaded {len(df)} Bluesky posts to S3: {filename}")
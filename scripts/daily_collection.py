@@ -1,48 +1,71 @@
 #!/usr/bin/env python3
 """
 Daily Data Collection
-Runs both Reddit sentiment scraping and price collection
+Runs Reddit/Bluesky sentiment scraping, price and Fear & Greed collection in parallel
 """
 
-from reddit_scraper import RedditScraper
-from price_collector import PriceCollector
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 
+def collect_reddit():
+    from reddit_scraper import RedditScraper
+    RedditScraper().run_scrape_and_upload()
+
+def collect_bluesky():
+    from bluesky_scraper import BlueskyScraper
+    BlueskyScraper().run_scrape_and_upload()
+
+def collect_prices():
+    from price_collector import PriceCollector
+    PriceCollector().run_collection_and_upload()
+
+def collect_fear_greed():
+    from fear_greed_collector import FearGreedCollector
+    FearGreedCollector().run_collection_and_upload()
+
+# Collectors hit independent endpoints and write independent S3 keys,
+# so they run concurrently; imports stay inside each job so a broken
+# module only fails its own collector. A critical collector's failure
+# fails the whole run once the others have finished.
+COLLECTORS = [
+    # (name, collect, critical)
+    ('Reddit sentiment data', collect_reddit, True),
+    ('Bluesky sentiment data', collect_bluesky, False),
+    ('price data', collect_prices, True),
+    ('Fear & Greed Index', collect_fear_greed, False),
+]
+
 def main():
     print(f"=== Daily Data Collection - {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')} ===")
-    
-    # Collect Reddit sentiment data
-    print("\n1. Collecting Reddit sentiment data...")
-    reddit_scraper = RedditScraper()
-    reddit_scraper.run_scrape_and_upload()
-    
-    # Collect Bluesky data
-    print("\n2. Collecting Bluesky sentiment data...")
-    try:
-        from bluesky_scraper import BlueskyScraper
-        bluesky_scraper = BlueskyScraper()
-        bluesky_scraper.run_scrape_and_upload()
-    except Exception as e:
-        print(f"Bluesky collection failed (non-critical): {e}")
-    
-    # Collect price data
-    print("\n3. Collecting price data...")
-    price_collector = PriceCollector()
-    price_collector.run_collection_and_upload()
-    
-    # Collect Fear & Greed Index
-    print("\n4. Collecting Fear & Greed Index...")
-    try:
-        from fear_greed_collector import FearGreedCollector
-        fear_greed_collector = FearGreedCollector()
-        fear_greed_collector.run_collection_and_upload()
-    except Exception as e:
-        print(f"Fear & Greed collection failed (non-critical): {e}")
-    
+
+    with ThreadPoolExecutor(max_workers=len(COLLECTORS)) as executor:
+        futures = {}
+        for name, collect, critical in COLLECTORS:
+            print(f"\nCollecting {name}...")
+            futures[executor.submit(collect)] = (name, critical)
+
+        critical_failures = []
+        for future in as_completed(futures):
+            name, critical = futures[future]
+            try:
+                future.result()
+                print(f"Finished collecting {name}")
+            except Exception as e:
+                if critical:
+                    print(f"{name} collection failed: {e}")
+                    critical_failures.append(name)
+                else:
+                    print(f"{name} collection failed (non-critical): {e}")
+
+    if critical_failures:
+        print(f"\nDaily collection failed: {', '.join(critical_failures)}")
+        sys.exit(1)
+
     # Options collection removed - not providing valuable insights
-    
+
     print("\nDaily collection complete!")
     print("Next: Run AI workbench to process the data")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -4,13 +4,12 @@ Crypto Fear & Greed Index Collector
 Collects the official Fear & Greed Index from Alternative.me
 """
 
-import requests
-import pandas as pd
-from datetime import datetime
+from datetime import datetime, timedelta
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from utils.s3_uploader import S3Uploader
+from utils.http_session import create_session, parse_json
 
 class FearGreedCollector:
     def __init__(self):
@@ -19,13 +18,16 @@ class FearGreedCollector:
         if not self.s3_uploader.bucket_name:
             self.s3_uploader.bucket_name = 'automated-trading-data-bucket'
         self.api_url = "https://api.alternative.me/fng/"
+        # Short-lived cache: repeated runs within minutes share one response, but a
+        # new day's value (and a current time_until_update) is never hidden
+        self.session = create_session(expire_after=timedelta(minutes=10))
     
     def get_current_fear_greed(self):
         """Get current Fear & Greed Index"""
         try:
-            response = requests.get(self.api_url)
+            response = self.session.get(self.api_url, timeout=10)
             response.raise_for_status()
-            data = response.json()
+            data = parse_json(response)
             
             if data['data']:
                 current = data['data'][0]
@@ -44,9 +46,9 @@ class FearGreedCollector:
         """Get historical Fear & Greed Index"""
         try:
             url = f"{self.api_url}?limit={days}"
-            response = requests.get(url)
+            response = self.session.get(url, timeout=10)
             response.raise_for_status()
-            data = response.json()
+            data = parse_json(response)
             
             historical_data = []
             for item in data['data']:
@@ -71,15 +73,14 @@ class FearGreedCollector:
                 print("No Fear & Greed data collected")
                 return
             
-            df = pd.DataFrame([current_data])
             print(f"Collected Fear & Greed Index: {current_data['fear_greed_value']} ({current_data['fear_greed_classification']})")
             
             # Generate filename with timestamp
             timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
-            filename = f"fear_greed_index_{timestamp}.csv"
+            filename = f"fear_greed_index_{timestamp}.json"
             
             # Upload to S3
-            success = self.s3_uploader.upload_dataframe(df, filename)
+            success = self.s3_uploader.upload_json(current_data, filename)
             
             if success:
                 print(f"Successfully uploaded Fear & Greed data to S3: {filename}")
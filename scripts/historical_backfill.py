@@ -4,14 +4,14 @@ Historical Data Backfill
 Collects years of Bitcoin network data, price history, and monetary data
 """
 
-import requests
 import pandas as pd
 from datetime import datetime
-import time
+from concurrent.futures import ThreadPoolExecutor
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from utils.s3_uploader import S3Uploader
+from utils.http_session import create_session, parse_json
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -19,6 +19,24 @@ load_dotenv()
 class HistoricalDataCollector:
     def __init__(self):
         self.s3_uploader = S3Uploader()
+        self.session = create_session()
+    
+    def fetch_json(self, url, params=None):
+        """GET a JSON endpoint over the shared keep-alive session"""
+        response = self.session.get(url, params=params, timeout=60)
+        response.raise_for_status()
+        return parse_json(response)
+    
+    def build_frame(self, dates, values, metric, description, category):
+        """Build a long-format metric frame column-wise instead of one dict per point"""
+        return pd.DataFrame({
+            'date': dates,
+            'metric': metric,
+            'value': values,
+            'description': description,
+            'category': category,
+            'collected_at': datetime.utcnow()
+        })
     
     def collect_bitcoin_network_history(self):
         """Collect complete Bitcoin network history from 2009-present"""
@@ -33,32 +51,39 @@ class HistoricalDataCollector:
             'n-transactions': 'Daily Transactions'
         }
         
-        all_data = []
+        frames = []
+        
+        # Fetch all metrics concurrently (at most 4 in flight to stay polite)
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = {
+                metric: executor.submit(
+                    self.fetch_json,
+                    f"https://api.blockchain.info/charts/{metric}?timespan=all&format=json"
+                )
+                for metric in metrics
+            }
         
         for metric, description in metrics.items():
             print(f"  Fetching {description}...")
             try:
-                url = f"https://api.blockchain.info/charts/{metric}?timespan=all&format=json"
-                response = requests.get(url)
-                response.raise_for_status()
-                data = response.json()
-                
-                for point in data['values']:
-                    all_data.append({
-                        'date': pd.to_datetime(point['x'], unit='s').date(),
-                        'metric': metric,
-                        'value': point['y'],
-                        'description': description,
-                        'category': 'bitcoin_network',
-                        'collected_at': datetime.utcnow()
-                    })
+                data = futures[metric].result()
                 
-                time.sleep(2)  # Rate limiting
+                points = pd.DataFrame(data['values'], columns=['x', 'y'])
+                frames.append(self.build_frame(
+                    pd.to_datetime(points['x'], unit='s').dt.date,
+                    points['y'],
+                    metric,
+                    description,
+                    'bitcoin_network'
+                ))
                 
             except Exception as e:
                 print(f"    Error fetching {metric}: {e}")
         
-        return pd.DataFrame(all_data)
+        if not frames:
+            return pd.DataFrame()
+        
+        return pd.concat(frames, ignore_index=True)
     
     def collect_bitcoin_price_history(self):
         """Collect Bitcoin price history from CoinGecko (using free tier)"""
@@ -66,25 +91,17 @@ class HistoricalDataCollector:
         
         try:
             # Use 365 days instead of max to avoid auth requirements
-            url = "https://api.coingecko.com/api/v3/coins/bitcoin/market_chart?vs_currency=usd&days=365"
-            response = requests.get(url)
-            response.raise_for_status()
-            data = response.json()
-            
-            price_data = []
+            data = self.fetch_json("https://api.coingecko.com/api/v3/coins/bitcoin/market_chart?vs_currency=usd&days=365")
             
             # Process price data
-            for timestamp, price in data['prices']:
-                price_data.append({
-                    'date': pd.to_datetime(timestamp, unit='ms').date(),
-                    'metric': 'price',
-                    'value': price,
-                    'description': 'BTC Price USD',
-                    'category': 'bitcoin_price',
-                    'collected_at': datetime.utcnow()
-                })
-            
-            return pd.DataFrame(price_data)
+            prices = pd.DataFrame(data['prices'], columns=['timestamp', 'price'])
+            return self.build_frame(
+                pd.to_datetime(prices['timestamp'], unit='ms').dt.date,
+                prices['price'],
+                'price',
+                'BTC Price USD',
+                'bitcoin_price'
+            )
             
         except Exception as e:
             print(f"Error fetching Bitcoin price history: {e}")
@@ -95,24 +112,16 @@ class HistoricalDataCollector:
         print("Collecting Ethereum price history (last 365 days)...")
         
         try:
-            url = "https://api.coingecko.com/api/v3/coins/ethereum/market_chart?vs_currency=usd&days=365"
-            response = requests.get(url)
-            response.raise_for_status()
-            data = response.json()
-            
-            eth_data = []
+            data = self.fetch_json("https://api.coingecko.com/api/v3/coins/ethereum/market_chart?vs_currency=usd&days=365")
             
-            for timestamp, price in data['prices']:
-                eth_data.append({
-                    'date': pd.to_datetime(timestamp, unit='ms').date(),
-                    'metric': 'eth_price',
-                    'value': price,
-                    'description': 'ETH Price USD',
-                    'category': 'ethereum_price',
-                    'collected_at': datetime.utcnow()
-                })
-            
-            return pd.DataFrame(eth_data)
+            prices = pd.DataFrame(data['prices'], columns=['timestamp', 'price'])
+            return self.build_frame(
+                pd.to_datetime(prices['timestamp'], unit='ms').dt.date,
+                prices['price'],
+                'eth_price',
+                'ETH Price USD',
+                'ethereum_price'
+            )
             
         except Exception as e:
             print(f"Error fetching Ethereum history: {e}")
@@ -129,7 +138,7 @@ class HistoricalDataCollector:
             print("  Get free key at: https://fred.stlouisfed.org/docs/api/api_key.html")
             return pd.DataFrame()
         
-        monetary_data = []
+        frames = []
         
         # Key monetary indicators
         series = {
@@ -138,38 +147,40 @@ class HistoricalDataCollector:
             'WALCL': 'Fed Balance Sheet'
         }
         
-        for series_id, description in series.items():
-            print(f"  Fetching {description}...")
-            try:
-                url = "https://api.stlouisfed.org/fred/series/observations"
-                params = {
+        url = "https://api.stlouisfed.org/fred/series/observations"
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            futures = {
+                series_id: executor.submit(self.fetch_json, url, {
                     'series_id': series_id,
                     'api_key': fred_api_key,
                     'file_type': 'json',
                     'observation_start': '2009-01-01'  # Bitcoin era (2009-present)
-                }
-                
-                response = requests.get(url, params=params)
-                response.raise_for_status()
-                data = response.json()
-                
-                for obs in data['observations']:
-                    if obs['value'] != '.':
-                        monetary_data.append({
-                            'date': pd.to_datetime(obs['date']).date(),
-                            'metric': series_id,
-                            'value': float(obs['value']),
-                            'description': description,
-                            'category': 'us_monetary',
-                            'collected_at': datetime.utcnow()
-                        })
+                })
+                for series_id in series
+            }
+        
+        for series_id, description in series.items():
+            print(f"  Fetching {description}...")
+            try:
+                data = futures[series_id].result()
                 
-                time.sleep(1)  # Rate limiting
+                observations = pd.DataFrame(data['observations'], columns=['date', 'value'])
+                observations = observations[observations['value'] != '.']  # FRED marks missing values with '.'
+                frames.append(self.build_frame(
+                    pd.to_datetime(observations['date'], format='%Y-%m-%d', cache=True).dt.date,
+                    observations['value'].astype(float),
+                    series_id,
+                    description,
+                    'us_monetary'
+                ))
                 
             except Exception as e:
                 print(f"    Error fetching {series_id}: {e}")
         
-        return pd.DataFrame(monetary_data)
+        if not frames:
+            return pd.DataFrame()
+        
+        return pd.concat(frames, ignore_index=True)
     
     def run_historical_backfill(self):
         """Main execution: collect all historical data"""
@@ -178,29 +189,23 @@ class HistoricalDataCollector:
         
         all_historical_data = []
         
-        # Collect Bitcoin network data (2009-present)
-        btc_network = self.collect_bitcoin_network_history()
-        if not btc_network.empty:
-            all_historical_data.append(btc_network)
-            print(f"Bitcoin network: {len(btc_network)} records")
-        
-        # Collect Bitcoin price data (2013-present)
-        btc_price = self.collect_bitcoin_price_history()
-        if not btc_price.empty:
-            all_historical_data.append(btc_price)
-            print(f"Bitcoin price: {len(btc_price)} records")
-        
-        # Collect Ethereum data (last 365 days)
-        eth_data = self.collect_crypto_market_data()
-        if not eth_data.empty:
-            all_historical_data.append(eth_data)
-            print(f"Ethereum price: {len(eth_data)} records")
-        
-        # Collect US monetary data (last 5 years)
-        monetary_data = self.collect_us_monetary_data()
-        if not monetary_data.empty:
-            all_historical_data.append(monetary_data)
-            print(f"US monetary data: {len(monetary_data)} records")
+        collectors = [
+            ('Bitcoin network', self.collect_bitcoin_network_history),  # 2009-present
+            ('Bitcoin price', self.collect_bitcoin_price_history),      # last 365 days
+            ('Ethereum price', self.collect_crypto_market_data),        # last 365 days
+            ('US monetary data', self.collect_us_monetary_data)         # 2009-present
+        ]
+        
+        # Sources are independent, so fetch them all at once over the shared
+        # session (both CoinGecko market charts are in flight together)
+        with ThreadPoolExecutor(max_workers=len(collectors)) as executor:
+            futures = [(name, executor.submit(collect)) for name, collect in collectors]
+        
+        for name, future in futures:
+            df = future.result()
+            if not df.empty:
+                all_historical_data.append(df)
+                print(f"{name}: {len(df)} records")
         
         if all_historical_data:
             # Combine all data
@@ -208,9 +213,9 @@ class HistoricalDataCollector:
             
             # Upload to S3
             timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
-            filename = f"historical_data_{timestamp}.csv"
+            filename = f"historical_data_{timestamp}.parquet"
             
-            success = self.s3_uploader.upload_dataframe(combined_df, filename)
+            success = self.s3_uploader.upload_parquet(combined_df, filename)
             
             if success:
                 duration = datetime.utcnow() - start_time
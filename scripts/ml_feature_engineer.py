@@ -7,55 +7,92 @@ sentiment features, and time-based features
 
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from utils.s3_uploader import S3Uploader
-import boto3
-from io import StringIO
+from utils.s3_client import get_s3_client
+from utils.memory_optimizer import SENTIMENT_LABELS
 from dotenv import load_dotenv
 
 load_dotenv()
 
+def day_key(timestamps):
+    """Days since the Unix epoch as int32, a cheap join key in place of datetime.date objects"""
+    return timestamps.to_numpy(dtype='datetime64[ns]').astype('datetime64[D]').astype(np.int32)
+
+def sorted_by_timestamp(df):
+    """Return a copy ordered by timestamp, skipping the sort when it already is"""
+    if not df['timestamp'].is_monotonic_increasing:
+        df = df.sort_values('timestamp', kind='mergesort')
+    return df.reset_index(drop=True)
+
 class MLFeatureEngineer:
     def __init__(self):
-        self.s3_client = boto3.client('s3')
+        self.s3_client = get_s3_client()
         self.bucket_name = os.getenv('S3_BUCKET_NAME')
         self.s3_uploader = S3Uploader()
     
+    def read_object(self, key, filters=None):
+        """Download and parse one Parquet or CSV object from S3
+
+        filters (pyarrow predicate list) only applies to Parquet, where row-group
+        statistics let pyarrow drop non-matching rows before pandas conversion.
+        """
+        response = self.s3_client.get_object(Bucket=self.bucket_name, Key=key)
+        if key.endswith('.parquet'):
+            return pd.read_parquet(BytesIO(response['Body'].read()), filters=filters)
+        # StreamingBody is file-like, so parse it without an intermediate decoded copy
+        return pd.read_csv(response['Body'])
+    
     def load_price_data(self, days=30):
         """Load recent price data from S3"""
         try:
-            objects = self.s3_client.list_objects_v2(
+            # LastModified from boto3 is tz-aware UTC, so compare against an aware
+            # cutoff; the price timestamps themselves are naive UTC
+            cutoff_date = datetime.now(timezone.utc) - timedelta(days=days)
+            row_cutoff = cutoff_date.replace(tzinfo=None)
+            
+            # Keys embed a UTC timestamp (price_data_YYYYMMDD_HHMMSS), so start the
+            # listing server-side at the day before the cutoff and page past 1000 keys
+            paginator = self.s3_client.get_paginator('list_objects_v2')
+            pages = paginator.paginate(
                 Bucket=self.bucket_name,
-                Prefix="raw-data/price_data_"
+                Prefix="raw-data/price_data_",
+                StartAfter=f"raw-data/price_data_{cutoff_date - timedelta(days=1):%Y%m%d}"
             )
             
-            if not objects.get('Contents'):
-                return pd.DataFrame()
-            
             # Get recent files
-            cutoff_date = datetime.now() - timedelta(days=days)
             recent_files = [
-                obj for obj in objects['Contents'] 
-                if obj['LastModified'].replace(tzinfo=None) >= cutoff_date
+                obj
+                for page in pages
+                for obj in page.get('Contents', [])
+                if obj['LastModified'] >= cutoff_date
             ]
             
-            all_data = []
-            for obj in recent_files:
-                response = self.s3_client.get_object(
-                    Bucket=self.bucket_name,
-                    Key=obj['Key']
-                )
-                csv_content = response['Body'].read().decode('utf-8')
-                df = pd.read_csv(StringIO(csv_content))
-                all_data.append(df)
+            if not recent_files:
+                return pd.DataFrame()
+            
+            # Each object is an independent GET, so overlap the network round trips.
+            # Recent files can still hold older rows, so push the cutoff into the read
+            filters = [('timestamp', '>=', row_cutoff)]
+            with ThreadPoolExecutor(max_workers=16) as executor:
+                all_data = list(executor.map(
+                    lambda key: self.read_object(key, filters),
+                    [obj['Key'] for obj in recent_files]
+                ))
             
             if all_data:
                 combined_df = pd.concat(all_data, ignore_index=True)
                 combined_df['timestamp'] = pd.to_datetime(combined_df['timestamp'])
-                return combined_df.sort_values('timestamp')
+                # CSV objects are not filtered on read
+                combined_df = combined_df[combined_df['timestamp'] >= row_cutoff]
+                # Sort once here (stable, so equal timestamps keep file order);
+                # per-symbol slices taken with a mask are then already in order
+                return combined_df.sort_values('timestamp', kind='mergesort').reset_index(drop=True)
             
             return pd.DataFrame()
             
@@ -66,26 +103,20 @@ class MLFeatureEngineer:
     def load_sentiment_data(self, days=30):
         """Load recent sentiment data from S3"""
         try:
-            objects = self.s3_client.list_objects_v2(
-                Bucket=self.bucket_name,
-                Prefix="processed-data/"
-            )
+            paginator = self.s3_client.get_paginator('list_objects_v2')
+            contents = [
+                obj
+                for page in paginator.paginate(Bucket=self.bucket_name, Prefix="processed-data/")
+                for obj in page.get('Contents', [])
+            ]
             
-            if not objects.get('Contents'):
+            if not contents:
                 return pd.DataFrame()
             
             # Get most recent processed file
-            latest = sorted(objects['Contents'], 
-                          key=lambda x: x['LastModified'], 
-                          reverse=True)[0]
-            
-            response = self.s3_client.get_object(
-                Bucket=self.bucket_name,
-                Key=latest['Key']
-            )
+            latest = max(contents, key=lambda x: x['LastModified'])
             
-            csv_content = response['Body'].read().decode('utf-8')
-            df = pd.read_csv(StringIO(csv_content))
+            df = self.read_object(latest['Key'])
             df['timestamp'] = pd.to_datetime(df['timestamp'])
             
             # Filter to recent data
@@ -98,73 +129,86 @@ class MLFeatureEngineer:
     
     def calculate_technical_indicators(self, price_df, symbol):
         """Calculate technical indicators for a specific symbol"""
-        symbol_df = price_df[price_df['symbol'] == symbol].copy()
-        symbol_df = symbol_df.sort_values('timestamp').reset_index(drop=True)
+        symbol_df = sorted_by_timestamp(price_df[price_df['symbol'] == symbol])
         
         if len(symbol_df) < 21:  # Need minimum data for indicators
             return symbol_df
         
+        # Every indicator is derived from the same price series: share the
+        # intermediates and attach all new columns in one concat rather than
+        # inserting them into the frame one at a time
+        price = symbol_df['price']
+        features = {}
+        
         # Simple Moving Averages
-        symbol_df['sma_7'] = symbol_df['price'].rolling(window=7).mean()
-        symbol_df['sma_21'] = symbol_df['price'].rolling(window=21).mean()
+        features['sma_7'] = price.rolling(window=7).mean()
+        features['sma_21'] = price.rolling(window=21).mean()
         
         # Exponential Moving Averages
-        symbol_df['ema_12'] = symbol_df['price'].ewm(span=12).mean()
-        symbol_df['ema_26'] = symbol_df['price'].ewm(span=26).mean()
+        ema_12 = price.ewm(span=12).mean()
+        ema_26 = price.ewm(span=26).mean()
+        features['ema_12'] = ema_12
+        features['ema_26'] = ema_26
         
         # MACD
-        symbol_df['macd'] = symbol_df['ema_12'] - symbol_df['ema_26']
-        symbol_df['macd_signal'] = symbol_df['macd'].ewm(span=9).mean()
-        symbol_df['macd_histogram'] = symbol_df['macd'] - symbol_df['macd_signal']
+        macd = ema_12 - ema_26
+        macd_signal = macd.ewm(span=9).mean()
+        features['macd'] = macd
+        features['macd_signal'] = macd_signal
+        features['macd_histogram'] = macd - macd_signal
         
         # RSI
-        delta = symbol_df['price'].diff()
+        delta = price.diff()
         gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
         loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
         rs = gain / loss
-        symbol_df['rsi'] = 100 - (100 / (1 + rs))
+        features['rsi'] = 100 - (100 / (1 + rs))
         
-        # Bollinger Bands
+        # Bollinger Bands (mean and std share one rolling window)
         bb_window = 20
         bb_std = 2
-        symbol_df['bb_middle'] = symbol_df['price'].rolling(window=bb_window).mean()
-        bb_std_dev = symbol_df['price'].rolling(window=bb_window).std()
-        symbol_df['bb_upper'] = symbol_df['bb_middle'] + (bb_std_dev * bb_std)
-        symbol_df['bb_lower'] = symbol_df['bb_middle'] - (bb_std_dev * bb_std)
-        symbol_df['bb_position'] = (symbol_df['price'] - symbol_df['bb_lower']) / (symbol_df['bb_upper'] - symbol_df['bb_lower'])
+        bb_rolling = price.rolling(window=bb_window)
+        bb_middle = bb_rolling.mean()
+        bb_std_dev = bb_rolling.std()
+        bb_upper = bb_middle + (bb_std_dev * bb_std)
+        bb_lower = bb_middle - (bb_std_dev * bb_std)
+        features['bb_middle'] = bb_middle
+        features['bb_upper'] = bb_upper
+        features['bb_lower'] = bb_lower
+        features['bb_position'] = (price - bb_lower) / (bb_upper - bb_lower)
         
         # Price momentum features
-        symbol_df['price_change_1d'] = symbol_df['price'].pct_change(1)
-        symbol_df['price_change_3d'] = symbol_df['price'].pct_change(3)
-        symbol_df['price_change_7d'] = symbol_df['price'].pct_change(7)
+        features['price_change_1d'] = price.pct_change(1)
+        features['price_change_3d'] = price.pct_change(3)
+        features['price_change_7d'] = price.pct_change(7)
         
         # Volume features (if available)
         if 'volume_24h' in symbol_df.columns:
-            symbol_df['volume_sma_7'] = symbol_df['volume_24h'].rolling(window=7).mean()
-            symbol_df['volume_ratio'] = symbol_df['volume_24h'] / symbol_df['volume_sma_7']
+            volume_sma_7 = symbol_df['volume_24h'].rolling(window=7).mean()
+            features['volume_sma_7'] = volume_sma_7
+            features['volume_ratio'] = symbol_df['volume_24h'] / volume_sma_7
         
-        return symbol_df
+        return pd.concat([symbol_df, pd.DataFrame(features)], axis=1)
     
     def calculate_sentiment_features(self, sentiment_df):
         """Calculate sentiment-based features"""
         if sentiment_df.empty or 'sentiment_label' not in sentiment_df.columns:
             return pd.DataFrame()
         
-        # Convert sentiment labels to numeric scores
-        sentiment_map = {
-            '1 star': 1, '2 stars': 2, '3 stars': 3, '4 stars': 4, '5 stars': 5
-        }
-        sentiment_df['sentiment_numeric'] = sentiment_df['sentiment_label'].map(sentiment_map)
+        # Convert sentiment labels to numeric scores via category codes;
+        # unknown labels get code -1 and become NaN
+        codes = sentiment_df['sentiment_label'].astype(SENTIMENT_LABELS).cat.codes
+        sentiment_df['sentiment_numeric'] = (codes + 1).where(codes >= 0)
         
         # Daily sentiment aggregation
-        sentiment_df['date'] = sentiment_df['timestamp'].dt.date
-        daily_sentiment = sentiment_df.groupby('date').agg({
+        sentiment_df['date_key'] = day_key(sentiment_df['timestamp'])
+        daily_sentiment = sentiment_df.groupby('date_key').agg({
             'sentiment_numeric': ['mean', 'std', 'count'],
             'sentiment_score': ['mean', 'std']
         }).reset_index()
         
         # Flatten column names
-        daily_sentiment.columns = ['date', 'sentiment_mean', 'sentiment_std', 'post_count', 
+        daily_sentiment.columns = ['date_key', 'sentiment_mean', 'sentiment_std', 'post_count', 
                                  'confidence_mean', 'confidence_std']
         
         # Calculate sentiment momentum
@@ -182,59 +226,69 @@ class MLFeatureEngineer:
     
     def create_time_features(self, df):
         """Create time-based features"""
-        df['hour'] = df['timestamp'].dt.hour
-        df['day_of_week'] = df['timestamp'].dt.dayofweek
-        df['day_of_month'] = df['timestamp'].dt.day
-        df['month'] = df['timestamp'].dt.month
-        df['quarter'] = df['timestamp'].dt.quarter
+        # Derive every field from one datetime64 array with integer arithmetic
+        # instead of a separate .dt accessor pass per feature
+        ts = df['timestamp'].to_numpy(dtype='datetime64[ns]')
+        days = ts.astype('datetime64[D]')
+        months = ts.astype('datetime64[M]')
+        
+        hour = ((ts - days) // np.timedelta64(1, 'h')).astype(np.int8)
+        day_of_week = ((days.astype(np.int64) + 3) % 7).astype(np.int8)  # 1970-01-01 was a Thursday
+        month = (months.astype(np.int64) % 12 + 1).astype(np.int8)
+        
+        df['hour'] = hour
+        df['day_of_week'] = day_of_week
+        df['day_of_month'] = ((days - months) // np.timedelta64(1, 'D') + 1).astype(np.int8)
+        df['month'] = month
+        df['quarter'] = (month - 1) // 3 + 1
         
         # Market hours (US market: 9:30 AM - 4:00 PM EST)
-        df['is_market_hours'] = ((df['hour'] >= 14) & (df['hour'] <= 21)).astype(int)  # UTC
-        df['is_weekend'] = (df['day_of_week'] >= 5).astype(int)
+        df['is_market_hours'] = ((hour >= 14) & (hour <= 21)).view(np.int8)  # UTC
+        df['is_weekend'] = (day_of_week >= 5).view(np.int8)
         
         return df
     
     def create_target_variables(self, df, symbol):
         """Create target variables for ML prediction"""
-        symbol_df = df[df['symbol'] == symbol].copy()
-        symbol_df = symbol_df.sort_values('timestamp').reset_index(drop=True)
-        
-        # Future price targets (what we want to predict)
-        symbol_df['target_1h'] = symbol_df['price'].shift(-1)  # Next data point
-        symbol_df['target_1d'] = symbol_df['price'].shift(-24)  # 24 hours ahead (if hourly data)
-        symbol_df['target_3d'] = symbol_df['price'].shift(-72)  # 3 days ahead
-        symbol_df['target_7d'] = symbol_df['price'].shift(-168)  # 7 days ahead
-        
-        # Target returns (percentage change)
-        symbol_df['target_return_1h'] = (symbol_df['target_1h'] / symbol_df['price'] - 1) * 100
-        symbol_df['target_return_1d'] = (symbol_df['target_1d'] / symbol_df['price'] - 1) * 100
-        symbol_df['target_return_3d'] = (symbol_df['target_3d'] / symbol_df['price'] - 1) * 100
-        symbol_df['target_return_7d'] = (symbol_df['target_7d'] / symbol_df['price'] - 1) * 100
-        
-        # Binary classification targets (up/down)
-        symbol_df['target_direction_1h'] = (symbol_df['target_return_1h'] > 0).astype(int)
-        symbol_df['target_direction_1d'] = (symbol_df['target_return_1d'] > 0).astype(int)
-        symbol_df['target_direction_3d'] = (symbol_df['target_return_3d'] > 0).astype(int)
-        symbol_df['target_direction_7d'] = (symbol_df['target_return_7d'] > 0).astype(int)
-        
-        return symbol_df
+        symbol_df = sorted_by_timestamp(df[df['symbol'] == symbol])
+        
+        # Future price targets (what we want to predict), in data points ahead:
+        # next point, 24 hours, 3 days and 7 days (if hourly data)
+        horizons = {'1h': 1, '1d': 24, '3d': 72, '7d': 168}
+        
+        # Compute all horizons as one (N, 4) block instead of 12 Series ops
+        price = symbol_df['price'].to_numpy(dtype=np.float64)
+        targets = np.full((len(price), len(horizons)), np.nan)
+        for i, shift in enumerate(horizons.values()):
+            targets[:-shift, i] = price[shift:]
+        
+        # Target returns (percentage change) and binary up/down targets
+        returns = (targets / price[:, None] - 1) * 100
+        directions = (returns > 0).astype(int)
+        
+        target_df = pd.concat([
+            pd.DataFrame(targets, columns=[f'target_{h}' for h in horizons]),
+            pd.DataFrame(returns, columns=[f'target_return_{h}' for h in horizons]),
+            pd.DataFrame(directions, columns=[f'target_direction_{h}' for h in horizons])
+        ], axis=1)
+        
+        return pd.concat([symbol_df, target_df], axis=1)
     
     def merge_features(self, price_df, sentiment_df):
         """Merge price and sentiment features"""
         if sentiment_df.empty:
             return price_df
         
-        # Convert timestamp to date for merging
+        # Keep the date column in the output; merge on a cheaper integer day key
         price_df['date'] = price_df['timestamp'].dt.date
+        price_df['date_key'] = day_key(price_df['timestamp'])
         
-        # Merge with sentiment features
-        merged_df = price_df.merge(sentiment_df, on='date', how='left')
-        
-        # Forward fill sentiment features for missing dates
-        sentiment_cols = [col for col in sentiment_df.columns if col != 'date']
-        merged_df[sentiment_cols] = merged_df[sentiment_cols].ffill()
+        # Take each row's latest sentiment day at or before it: the join and the
+        # forward fill over missing dates in one pass (both sides are sorted by day).
+        # Gaps inside the daily stats are filled on the small daily frame
+        merged_df = pd.merge_asof(price_df, sentiment_df.ffill(), on='date_key', direction='backward')
         
-        return merged_df
+        return merged_df.drop(columns='date_key')
     
     def create_ml_dataset(self, symbol='BTC', days=30):
         """Create complete ML dataset for a symbol"""
@@ -263,8 +317,18 @@ class MLFeatureEngineer:
         # Create target variables
         ml_df = self.create_target_variables(ml_df, symbol)
         
-        # Remove rows with NaN targets (can't predict future for latest data)
-        ml_df = ml_df.dropna(subset=['target_1d', 'target_return_1d'])
+        # Remove rows with NaN targets (can't predict future for latest data),
+        # masking on the raw arrays rather than through dropna's per-column Series
+        has_target = ~(
+            np.isnan(ml_df['target_1d'].to_numpy()) | np.isnan(ml_df['target_return_1d'].to_numpy())
+        )
+        ml_df = ml_df.iloc[has_target]
+        
+        # Features are ratios, prices and 0/1 flags: float32/int8 halve the
+        # dataset in memory and in the uploaded Parquet (time features are int8 already)
+        compact_dtypes = {col: np.float32 for col in ml_df.select_dtypes('float64').columns}
+        compact_dtypes.update({col: np.int8 for col in ml_df.columns if col.startswith('target_direction_')})
+        ml_df = ml_df.astype(compact_dtypes)
         
         print(f"Created ML dataset with {len(ml_df)} samples and {len(ml_df.columns)} features")
         
@@ -277,15 +341,37 @@ class MLFeatureEngineer:
             return
         
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"ml_features_{symbol}_{timestamp}.csv"
+        filename = f"ml_features_{symbol}_{timestamp}.parquet"
         
-        success = self.s3_uploader.upload_dataframe(ml_df, filename)
+        success = self.s3_uploader.upload_parquet(ml_df, filename)
         
         if success:
             print(f"✅ Saved ML dataset to S3: {filename}")
         else:
             print("❌ Failed to save ML dataset")
     
+    def target_correlations(self, ml_df, target):
+        """Absolute Pearson correlation of every numeric column with the target
+
+        Only the target column of the correlation matrix is needed, so compute
+        it directly in O(features x rows), using each column's rows where both
+        values are present (as DataFrame.corr does).
+        """
+        numeric_cols = ml_df.select_dtypes(include=[np.number]).columns
+        X = ml_df[numeric_cols].to_numpy(dtype=np.float64)
+        y = ml_df[target].to_numpy(dtype=np.float64)[:, None]
+        
+        valid = ~np.isnan(X) & ~np.isnan(y)
+        count = valid.sum(axis=0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            x_centered = np.where(valid, X - np.where(valid, X, 0).sum(axis=0) / count, 0)
+            y_centered = np.where(valid, y - np.where(valid, y, 0).sum(axis=0) / count, 0)
+            corr = (x_centered * y_centered).sum(axis=0) / np.sqrt(
+                (x_centered ** 2).sum(axis=0) * (y_centered ** 2).sum(axis=0)
+            )
+        
+        return pd.Series(np.abs(corr), index=numeric_cols).sort_values(ascending=False)
+    
     def run_feature_engineering(self, symbols=['BTC']):
         """Main execution: create ML datasets for specified symbols"""
         print("=== ML Feature Engineering Started ===")
@@ -304,8 +390,7 @@ class MLFeatureEngineer:
                     
                     # Show feature correlation with target
                     if 'target_return_1d' in ml_df.columns:
-                        numeric_cols = ml_df.select_dtypes(include=[np.number]).columns
-                        correlations = ml_df[numeric_cols].corr()['target_return_1d'].abs().sort_values(ascending=False)
+                        correlations = self.target_correlations(ml_df, 'target_return_1d')
                         print(f"  Top correlated features:")
                         for feature, corr in correlations.head(5).items():
                             if feature != 'target_return_1d':
@@ -4,20 +4,60 @@ Price Data Collector
 Collects current prices for major assets to correlate with sentiment
 """
 
-import requests
 import pandas as pd
-from datetime import datetime
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
 import os
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from utils.s3_uploader import S3Uploader
+from utils.http_session import create_session, parse_json
+from utils.rate_limiter import TokenBucket
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# /coins/markets returns price, market cap, volume and 24h change for every
+# coin in one list, the same single round trip as /simple/price
+COINGECKO_MARKETS_URL = "https://api.coingecko.com/api/v3/coins/markets"
+COINGECKO_MARKETS_PARAMS = {
+    'vs_currency': 'usd',
+    'ids': 'bitcoin,ethereum,monero,litecoin',
+    'sparkline': 'false'
+}
+
+# CoinGecko coin id -> ticker symbol
+SYMBOL_MAP = {
+    'bitcoin': 'BTC',
+    'ethereum': 'ETH',
+    'monero': 'XMR',
+    'litecoin': 'LTC'
+}
+
+# Short-lived on-disk response cache shared with quick_price_update, so runs
+# that land close together reuse one CoinGecko/Yahoo response. Expired entries
+# are kept: if the server sent an ETag/Last-Modified, the next fetch is a
+# conditional GET and a 304 reuses the stored body (e.g. closed-market Yahoo charts)
+PRICE_CACHE_EXPIRY = {
+    'api.coingecko.com': timedelta(seconds=90),
+    'query1.finance.yahoo.com': timedelta(seconds=30)
+}
+
+# Column layout of the uploaded price_data files
+PRICE_COLUMNS = [
+    'timestamp', 'category', 'symbol', 'price', 'change_24h', 'volume_24h',
+    'volatility', 'volume_price_ratio', 'market_cap', 'data_type'
+]
+
 class PriceCollector:
     def __init__(self):
         self.s3_uploader = S3Uploader()
+        # One keep-alive session for CoinGecko and Yahoo instead of a new TLS handshake per request
+        self.session = create_session(urls_expire_after=PRICE_CACHE_EXPIRY)
+        # Per-host request budgets: Yahoo tolerates short bursts, the
+        # CoinGecko free tier allows roughly 10 calls a minute
+        self.yahoo_limiter = TokenBucket(5)
+        self.coingecko_limiter = TokenBucket(10 / 60, capacity=10)
         
         # Assets to track by category
         self.assets = {
@@ -42,41 +82,27 @@ class PriceCollector:
         
         try:
             # Enhanced CoinGecko API call with more data
-            url = "https://api.coingecko.com/api/v3/simple/price"
-            params = {
-                'ids': 'bitcoin,ethereum,monero,litecoin',
-                'vs_currencies': 'usd',
-                'include_market_cap': 'true',
-                'include_24hr_change': 'true',
-                'include_24hr_vol': 'true',
-                'include_last_updated_at': 'true'
-            }
-            
-            response = requests.get(url, params=params)
+            self.coingecko_limiter.acquire()
+            response = self.session.get(COINGECKO_MARKETS_URL, params=COINGECKO_MARKETS_PARAMS, timeout=10)
             response.raise_for_status()
-            data = response.json()
+            data = parse_json(response)
             
             # Format crypto data with ML features
-            for coin_id, coin_data in data.items():
-                symbol_map = {
-                    'bitcoin': 'BTC',
-                    'ethereum': 'ETH', 
-                    'monero': 'XMR',
-                    'litecoin': 'LTC'
-                }
-                symbol = symbol_map.get(coin_id, coin_id.upper())
-                price = coin_data['usd']
-                volume_24h = coin_data.get('usd_24h_vol', 0)
-                change_24h = coin_data.get('usd_24h_change', 0)
+            for coin in data:
+                symbol = SYMBOL_MAP.get(coin['id'], coin['id'].upper())
+                price = coin['current_price']
+                # Fields CoinGecko can't compute come back as null
+                volume_24h = coin.get('total_volume') or 0
+                change_24h = coin.get('price_change_percentage_24h') or 0
                 
                 crypto_data[symbol] = {
                     'price': price,
-                    'market_cap': coin_data.get('usd_market_cap', 0),
+                    'market_cap': coin.get('market_cap') or 0,
                     'change_24h': change_24h,
                     'volume_24h': volume_24h,
                     'volatility': abs(change_24h),  # Simple volatility measure
                     'volume_price_ratio': volume_24h / price if price > 0 else 0,
-                    'last_updated': coin_data.get('last_updated_at', 0)
+                    'last_updated': coin.get('last_updated')
                 }
                 
         except Exception as e:
@@ -84,95 +110,89 @@ class PriceCollector:
         
         return crypto_data
     
-    def get_stock_prices(self) -> dict:
-        """Get stock prices from Yahoo Finance with rate limiting"""
-        stock_data = {}
-        
+    def get_stock_quote(self, symbol: str):
+        """Get one stock quote from Yahoo Finance, or None if unavailable"""
         try:
             # Using Yahoo Finance API (free, unofficial)
-            symbols = ['SPY', 'QQQ', 'VTI', 'TSLA']
+            url = f"https://query1.finance.yahoo.com/v8/finance/chart/{symbol}"
+            headers = {
+                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+            }
+            self.yahoo_limiter.acquire()
+            # The session's adapter already retries 429s, honouring Retry-After
+            response = self.session.get(url, headers=headers, timeout=10)
             
-            for i, symbol in enumerate(symbols):
-                # Add longer delay between requests to avoid rate limits
-                if i > 0:
-                    import time
-                    time.sleep(5)  # Increased delay
+            if response.status_code == 429:
+                print(f"Still rate limited for {symbol}, skipping...")
+                return None
                 
-                url = f"https://query1.finance.yahoo.com/v8/finance/chart/{symbol}"
-                headers = {
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                }
-                response = requests.get(url, headers=headers)
+            response.raise_for_status()
+            data = parse_json(response)
+            
+            if 'chart' in data and data['chart']['result']:
+                result = data['chart']['result'][0]
+                current_price = result['meta']['regularMarketPrice']
+                prev_close = result['meta']['previousClose']
+                change_pct = ((current_price - prev_close) / prev_close) * 100
                 
-                if response.status_code == 429:
-                    print(f"Rate limited for {symbol}, waiting 30 seconds...")
-                    import time
-                    time.sleep(30)
-                    # Retry once
-                    response = requests.get(url, headers=headers)
-                    if response.status_code == 429:
-                        print(f"Still rate limited for {symbol}, skipping...")
-                        continue
-                    
-                response.raise_for_status()
-                data = response.json()
+                return {
+                    'price': current_price,
+                    'change_24h': change_pct,
+                    'prev_close': prev_close
+                }
                 
-                if 'chart' in data and data['chart']['result']:
-                    result = data['chart']['result'][0]
-                    current_price = result['meta']['regularMarketPrice']
-                    prev_close = result['meta']['previousClose']
-                    change_pct = ((current_price - prev_close) / prev_close) * 100
-                    
-                    stock_data[symbol] = {
-                        'price': current_price,
-                        'change_24h': change_pct,
-                        'prev_close': prev_close
-                    }
-                    
         except Exception as e:
-            print(f"Error fetching stock prices: {e}")
-            # Continue with crypto data even if stocks fail
+            print(f"Error fetching stock price for {symbol}: {e}")
+        
+        return None
+    
+    def get_stock_prices(self) -> dict:
+        """Get stock prices from Yahoo Finance, one concurrent request per symbol"""
+        symbols = list(self.assets['US_STOCKS'])
+        
+        # Requests are pure I/O wait, so overlap them on the pooled session
+        # instead of spacing them out; a failed symbol doesn't affect the others
+        with ThreadPoolExecutor(max_workers=len(symbols)) as executor:
+            quotes = executor.map(self.get_stock_quote, symbols)
         
-        return stock_data
+        return {
+            symbol: quote
+            for symbol, quote in zip(symbols, quotes)
+            if quote is not None
+        }
     
     def collect_all_prices(self) -> pd.DataFrame:
         """Collect enhanced price data with ML features"""
         timestamp = datetime.utcnow()
-        all_data = []
+        frames = []
         
-        # Get crypto prices with enhanced features
+        # Get crypto prices with enhanced features (one row per symbol key)
         crypto_prices = self.get_crypto_prices()
-        for symbol, data in crypto_prices.items():
-            all_data.append({
-                'timestamp': timestamp,
-                'category': 'CRYPTO',
-                'symbol': symbol,
-                'price': data['price'],
-                'change_24h': data['change_24h'],
-                'volume_24h': data.get('volume_24h', 0),
-                'volatility': data.get('volatility', 0),
-                'volume_price_ratio': data.get('volume_price_ratio', 0),
-                'market_cap': data.get('market_cap', 0),
-                'data_type': 'price'
-            })
+        if crypto_prices:
+            frames.append(
+                pd.DataFrame.from_dict(crypto_prices, orient='index').assign(category='CRYPTO')
+            )
         
         # Get stock prices
         stock_prices = self.get_stock_prices()
-        for symbol, data in stock_prices.items():
-            all_data.append({
-                'timestamp': timestamp,
-                'category': 'US_STOCKS',
-                'symbol': symbol,
-                'price': data['price'],
-                'change_24h': data['change_24h'],
-                'volume_24h': 0,  # Not available from Yahoo Finance simple API
-                'volatility': abs(data['change_24h']),
-                'volume_price_ratio': 0,
-                'market_cap': 0,  # Not applicable for ETFs
-                'data_type': 'price'
-            })
+        if stock_prices:
+            frames.append(
+                pd.DataFrame.from_dict(stock_prices, orient='index').assign(
+                    category='US_STOCKS',
+                    volume_24h=0,  # Not available from Yahoo Finance simple API
+                    volatility=lambda df: df['change_24h'].abs(),
+                    volume_price_ratio=0,
+                    market_cap=0  # Not applicable for ETFs
+                )
+            )
+        
+        if not frames:
+            return pd.DataFrame()
         
-        return pd.DataFrame(all_data)
+        df = pd.concat(frames).rename_axis('symbol').reset_index()
+        df['timestamp'] = pd.Timestamp(timestamp).as_unit('ns')
+        df['data_type'] = 'price'
+        return df[PRICE_COLUMNS]
     
     def run_collection_and_upload(self):
         """Main execution: collect prices and upload to S3"""
@@ -188,10 +208,10 @@ class PriceCollector:
             
             # Generate filename with timestamp
             timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
-            filename = f"price_data_{timestamp}.csv"
+            filename = f"price_data_{timestamp}.parquet"
             
             # Upload to S3
-            success = self.s3_uploader.upload_dataframe(df, filename)
+            success = self.s3_uploader.upload_parquet(df, filename)
             
             if success:
                 print(f"Successfully uploaded price data to S3: {filename}")
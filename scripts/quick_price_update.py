@@ -4,13 +4,14 @@ Quick Price Updates - Every 5 minutes
 Fast price collection without heavy processing
 """
 
-import requests
 import pandas as pd
 from datetime import datetime
 import os
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from utils.s3_uploader import S3Uploader
+from utils.http_session import create_session, parse_json
+from price_collector import COINGECKO_MARKETS_URL, COINGECKO_MARKETS_PARAMS, PRICE_CACHE_EXPIRY, SYMBOL_MAP
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -21,38 +22,29 @@ def quick_price_update():
     
     # Fast crypto prices (single API call)
     try:
-        url = "https://api.coingecko.com/api/v3/simple/price"
-        params = {
-            'ids': 'bitcoin,ethereum,monero,litecoin',
-            'vs_currencies': 'usd',
-            'include_24hr_change': 'true'
-        }
-        
-        response = requests.get(url, params=params, timeout=10)
-        data = response.json()
+        # Same request as PriceCollector, so either job can answer from the
+        # other's cached response when they run within the cache window
+        session = create_session(urls_expire_after=PRICE_CACHE_EXPIRY)
+        response = session.get(COINGECKO_MARKETS_URL, params=COINGECKO_MARKETS_PARAMS, timeout=10)
+        data = parse_json(response)
         
         price_data = []
-        for coin_id, coin_data in data.items():
-            symbol_map = {
-                'bitcoin': 'BTC',
-                'ethereum': 'ETH',
-                'monero': 'XMR', 
-                'litecoin': 'LTC'
-            }
-            symbol = symbol_map.get(coin_id, coin_id.upper())
+        for coin in data:
+            symbol = SYMBOL_MAP.get(coin['id'], coin['id'].upper())
             price_data.append({
                 'timestamp': timestamp,
                 'symbol': symbol,
-                'price': coin_data['usd'],
-                'change_24h': coin_data.get('usd_24h_change', 0),
+                'price': coin['current_price'],
+                'change_24h': coin.get('price_change_percentage_24h') or 0,
                 'data_type': 'quick_price'
             })
         
         df = pd.DataFrame(price_data)
-        filename = f"quick_prices_{timestamp.strftime('%Y%m%d_%H%M%S')}.csv"
+        filename = f"quick_prices_{timestamp.strftime('%Y%m%d_%H%M%S')}.parquet"
         
-        if s3_uploader.upload_dataframe(df, filename):
-            print(f"✅ Quick price update: BTC ${data['bitcoin']['usd']:.0f}, ETH ${data['ethereum']['usd']:.0f}")
+        if s3_uploader.upload_parquet(df, filename):
+            prices = dict(zip(df['symbol'], df['price']))
+            print(f"✅ Quick price update: BTC ${prices['BTC']:.0f}, ETH ${prices['ETH']:.0f}")
         else:
             print("❌ Upload failed")
             
@@ -5,24 +5,46 @@ Scrapes posts and comments from financial subreddits for sentiment analysis
 """
 
 import praw
+from prawcore.exceptions import ServerError, TooManyRequests
 import pandas as pd
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import threading
+import re
 import os
 import sys
-from typing import List, Dict
+from typing import List
+from collections import namedtuple
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from utils.s3_uploader import S3Uploader
 from utils.deduplicator import DataDeduplicator
+from utils.aimd import AIMDController
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Bounds for concurrent Reddit requests in flight; the actual limit adapts
+# between them. PRAW still honours Reddit's rate-limit headers
+REDDIT_MIN_WORKERS = 2
+REDDIT_MAX_WORKERS = 20
+
+# One fixed schema for post and comment rows (fields a row type lacks stay None)
+REDDIT_COLUMNS = (
+    'id', 'subreddit', 'category', 'title', 'content', 'url', 'score', 'upvote_ratio',
+    'num_comments', 'created_utc', 'author', 'flair', 'type', 'timestamp', 'post_id'
+)
+RedditRow = namedtuple('RedditRow', REDDIT_COLUMNS, defaults=(None,) * len(REDDIT_COLUMNS))
+
 class RedditScraper:
     def __init__(self):
-        self.reddit = praw.Reddit(
-            client_id=os.getenv('REDDIT_CLIENT_ID'),
-            client_secret=os.getenv('REDDIT_CLIENT_SECRET'),
-            user_agent=os.getenv('REDDIT_USER_AGENT', 'TradingBot/1.0')
+        # praw.Reddit is not thread-safe, so each worker thread gets its own
+        self._local = threading.local()
+        # Grows while Reddit answers quickly, halves on 429s and 5xx errors
+        self.concurrency = AIMDController(
+            c_min=REDDIT_MIN_WORKERS,
+            c_max=REDDIT_MAX_WORKERS,
+            initial=10,
+            overload_errors=(TooManyRequests, ServerError)
         )
         self.s3_uploader = S3Uploader()
         self.deduplicator = DataDeduplicator()
@@ -33,6 +55,15 @@ class RedditScraper:
             'tickers': ['tsla', 'aapl', 'msft', 'googl', 'amzn', 'meta', 'nvda', 'btc', 'eth', 'blsh'],
             'financial_terms': ['stock', 'shares', 'earnings', 'revenue', 'profit', 'market', 'trading', 'investment', 'crypto', 'ipo', 'bullish']
         }
+        # Single compiled pattern so each post is scanned once for all keywords.
+        # Keywords must start a word ('eth' no longer matches 'method') but may
+        # continue it, so plurals like 'stocks' and 'markets' still count
+        self._kw_re = re.compile(
+            r'\b(?:' + '|'.join(
+                re.escape(k) for keyword_list in self.financial_keywords.values() for k in keyword_list
+            ) + ')',
+            re.IGNORECASE
+        )
         
         # Financial subreddits organized by market category
         self.subreddit_categories = {
@@ -93,33 +124,42 @@ class RedditScraper:
         self.subreddits = []
         for category, subs in self.subreddit_categories.items():
             self.subreddits.extend(subs)
+        
+        # Subreddit -> category lookup; a subreddit listed under several
+        # categories keeps the first one
+        self._sub_to_category = {}
+        for category, subs in self.subreddit_categories.items():
+            for sub in subs:
+                self._sub_to_category.setdefault(sub, category)
+    
+    @property
+    def reddit(self) -> praw.Reddit:
+        """PRAW client for the calling thread"""
+        if not hasattr(self._local, 'reddit'):
+            self._local.reddit = praw.Reddit(
+                client_id=os.getenv('REDDIT_CLIENT_ID'),
+                client_secret=os.getenv('REDDIT_CLIENT_SECRET'),
+                user_agent=os.getenv('REDDIT_USER_AGENT', 'TradingBot/1.0')
+            )
+        return self._local.reddit
     
     def is_financially_relevant(self, title, content):
         """Check if a post contains financial keywords"""
-        text = f"{title} {content}".lower()
-        
-        # Check for any financial keywords
-        for keyword_list in self.financial_keywords.values():
-            for keyword in keyword_list:
-                if keyword in text:
-                    return True
-        return False
+        return bool(self._kw_re.search(title) or (content and self._kw_re.search(content)))
     
-    def scrape_subreddit_posts(self, subreddit_name: str, limit: int = 100) -> List[Dict]:
+    def scrape_subreddit_posts(self, subreddit_name: str, limit: int = 100) -> List[RedditRow]:
         """Scrape hot posts from a subreddit"""
         posts = []
         
         # Find which category this subreddit belongs to
-        category = 'OTHER'
-        for cat, subs in self.subreddit_categories.items():
-            if subreddit_name in subs:
-                category = cat
-                break
+        category = self._sub_to_category.get(subreddit_name, 'OTHER')
         
         try:
-            subreddit = self.reddit.subreddit(subreddit_name)
+            with self.concurrency.slot():
+                hot_posts = list(self.reddit.subreddit(subreddit_name).hot(limit=limit))
+            scraped_at = datetime.utcnow()
             
-            for post in subreddit.hot(limit=limit):
+            for post in hot_posts:
                 # Skip stickied posts
                 if post.stickied:
                     continue
@@ -129,22 +169,22 @@ class RedditScraper:
                     if not self.is_financially_relevant(post.title, post.selftext):
                         continue
                 
-                post_data = {
-                    'id': post.id,
-                    'subreddit': subreddit_name,
-                    'category': category,  # Add market category
-                    'title': post.title,
-                    'content': post.selftext if post.selftext else '',
-                    'url': post.url,
-                    'score': post.score,
-                    'upvote_ratio': post.upvote_ratio,
-                    'num_comments': post.num_comments,
-                    'created_utc': datetime.fromtimestamp(post.created_utc),
-                    'author': str(post.author) if post.author else '[deleted]',
-                    'flair': post.link_flair_text,
-                    'type': 'post',
-                    'timestamp': datetime.utcnow()
-                }
+                post_data = RedditRow(
+                    id=post.id,
+                    subreddit=subreddit_name,
+                    category=category,  # Add market category
+                    title=post.title,
+                    content=post.selftext if post.selftext else '',
+                    url=post.url,
+                    score=post.score,
+                    upvote_ratio=post.upvote_ratio,
+                    num_comments=post.num_comments,
+                    created_utc=post.created_utc,  # epoch seconds, converted per column later
+                    author=str(post.author) if post.author else '[deleted]',
+                    flair=post.link_flair_text,
+                    type='post',
+                    timestamp=scraped_at
+                )
                 posts.append(post_data)
                 
         except Exception as e:
@@ -152,36 +192,37 @@ class RedditScraper:
         
         return posts
     
-    def scrape_post_comments(self, post_id: str, limit: int = 50) -> List[Dict]:
+    def scrape_post_comments(self, post_id: str, limit: int = 50) -> List[RedditRow]:
         """Scrape top comments from a specific post"""
         comments = []
         
         try:
-            submission = self.reddit.submission(id=post_id)
-            submission.comments.replace_more(limit=0)  # Remove "more comments"
+            with self.concurrency.slot():
+                submission = self.reddit.submission(id=post_id)
+                submission.comments.replace_more(limit=0)  # Remove "more comments"
+            scraped_at = datetime.utcnow()
+            
+            # Same subreddit for every comment: look its category up once
+            subreddit_name = submission.subreddit.display_name
+            category = self._sub_to_category.get(subreddit_name, 'OTHER')
             
+            # replace_more(limit=0) leaves only Comment objects in the forest, all
+            # hydrated from the one comments response; author is built from the
+            # listing's author name, so str() on it doesn't fetch the profile
             for comment in submission.comments[:limit]:
-                if hasattr(comment, 'body') and comment.body != '[deleted]':
-                    # Find category for this subreddit
-                    category = 'OTHER'
-                    subreddit_name = submission.subreddit.display_name
-                    for cat, subs in self.subreddit_categories.items():
-                        if subreddit_name in subs:
-                            category = cat
-                            break
-                    
-                    comment_data = {
-                        'id': comment.id,
-                        'post_id': post_id,
-                        'subreddit': subreddit_name,
-                        'category': category,  # Add market category
-                        'content': comment.body,
-                        'score': comment.score,
-                        'created_utc': datetime.fromtimestamp(comment.created_utc),
-                        'author': str(comment.author) if comment.author else '[deleted]',
-                        'type': 'comment',
-                        'timestamp': datetime.utcnow()
-                    }
+                if comment.body != '[deleted]':
+                    comment_data = RedditRow(
+                        id=comment.id,
+                        post_id=post_id,
+                        subreddit=subreddit_name,
+                        category=category,  # Add market category
+                        content=comment.body,
+                        score=comment.score,
+                        created_utc=comment.created_utc,
+                        author=str(comment.author) if comment.author else '[deleted]',
+                        type='comment',
+                        timestamp=scraped_at
+                    )
                     comments.append(comment_data)
                     
         except Exception as e:
@@ -195,19 +236,40 @@ class RedditScraper:
         
         print(f"Scraping {len(self.subreddits)} financial subreddits...")
         
-        for subreddit_name in self.subreddits:
+        def scrape_posts(subreddit_name):
             print(f"Scraping r/{subreddit_name}...")
-            posts = self.scrape_subreddit_posts(subreddit_name, posts_per_sub)
-            all_data.extend(posts)
+            return self.scrape_subreddit_posts(subreddit_name, posts_per_sub)
+        
+        # Every request is network-bound, so run them from a pool sized to the
+        # concurrency ceiling (self.concurrency gates how many are in flight).
+        # Each comment tree is its own request, so queue a subreddit's top-post
+        # comment fetches as soon as its listing arrives rather than after all
+        # listings have finished
+        with ThreadPoolExecutor(max_workers=REDDIT_MAX_WORKERS) as executor:
+            listing_futures = [executor.submit(scrape_posts, name) for name in self.subreddits]
             
             # Get comments from top posts
-            top_posts = sorted(posts, key=lambda x: x['score'], reverse=True)[:5]
-            for post in top_posts:
-                comments = self.scrape_post_comments(post['id'], 20)
-                all_data.extend(comments)
+            comment_futures = {}
+            for listing in as_completed(listing_futures):
+                top_posts = sorted(listing.result(), key=lambda x: x.score, reverse=True)[:5]
+                comment_futures[listing] = [
+                    executor.submit(self.scrape_post_comments, post.id, 20)
+                    for post in top_posts
+                ]
+            
+            # Assemble in subreddit order: each sub's posts, then their comments
+            for listing in listing_futures:
+                all_data.extend(listing.result())
+                for future in comment_futures[listing]:
+                    all_data.extend(future.result())
         
-        df = pd.DataFrame(all_data)
-        print(f"Scraped {len(df)} total items ({len(df[df['type']=='post'])} posts, {len(df[df['type']=='comment'])} comments)")
+        # Rows are plain tuples in REDDIT_COLUMNS order: no per-row dict key inference
+        df = pd.DataFrame.from_records(all_data, columns=REDDIT_COLUMNS)
+        if not df.empty:
+            # One vectorized epoch -> naive UTC conversion instead of a datetime per row
+            df['created_utc'] = pd.to_datetime(df['created_utc'], unit='s')
+        counts = df['type'].value_counts() if 'type' in df.columns else {}
+        print(f"Scraped {len(df)} total items ({counts.get('post', 0)} posts, {counts.get('comment', 0)} comments)")
         
         return df
     
@@ -230,10 +292,10 @@ class RedditScraper:
             
             # Generate filename with timestamp
             timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
-            filename = f"reddit_financial_{timestamp}.csv"
+            filename = f"reddit_financial_{timestamp}.parquet"
             
-            # Upload to S3
-            success = self.s3_uploader.upload_dataframe(df, filename)
+            # Upload to S3 (Parquet: long text columns compress far better than CSV)
+            success = self.s3_uploader.upload_parquet(df, filename)
             
             if success:
                 print(f"Successfully uploaded {len(df)} records to S3: {filename}")
@@ -6,40 +6,58 @@ Multi-signal detection system for emerging investment opportunities
 
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import re
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from utils.s3_uploader import S3Uploader
+from utils.s3_client import get_s3_client
+from utils.memory_optimizer import SENTIMENT_LABELS
 from dotenv import load_dotenv
-import boto3
-from io import StringIO
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+from io import BytesIO
+import csv
 import json
+from concurrent.futures import ThreadPoolExecutor
 
 load_dotenv()
 
+# The only Reddit columns detection reads; the rest are skipped when loading
+TREND_COLUMNS = ['title', 'content', 'timestamp', 'sentiment_label']
+
+def symbol_pattern(symbols):
+    """Regex alternation of symbols factored into a prefix trie
+
+    re tries alternatives one at a time, so 'BB|BBBY|BTC|BLSH' re-compares the
+    leading B for each; B(?:B(?:BY)?|LSH|TC) rejects a non-match at the first
+    differing character instead.
+    """
+    trie = {}
+    for symbol in symbols:
+        node = trie
+        for char in symbol:
+            node = node.setdefault(char, {})
+        node[''] = {}  # end of a symbol
+    
+    def emit(node):
+        branches = [re.escape(char) + emit(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        pattern = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        # A symbol ending here makes the longer continuations optional
+        return f'(?:{pattern})?' if '' in node else pattern
+    
+    return emit(trie)
+
 class TrendingDetector:
     def __init__(self):
-        self.s3_client = boto3.client('s3')
+        self.s3_client = get_s3_client()
         self.bucket_name = os.getenv('S3_BUCKET_NAME')
         self.s3_uploader = S3Uploader()
         
-    def get_user_watchlists(self):
-        """Load user watchlists from S3"""
-        try:
-            response = self.s3_client.get_object(
-                Bucket=self.bucket_name,
-                Key="user_data/watchlists.json"
-            )
-            data = json.loads(response['Body'].read().decode('utf-8'))
-            all_stocks = set()
-            for user_data in data["users"].values():
-                all_stocks.update(user_data.get("stocks", []))
-            return list(all_stocks)
-        except:
-            return []
-    
         # Signal weights for composite scoring
         self.signals = {
             'reddit_mentions': 0.4,      # 40% weight - primary signal
@@ -62,38 +80,96 @@ class TrendingDetector:
         
         # Get user watchlists
         self.tracked_symbols = self.base_symbols + self.get_user_watchlists()
+        
+        # Source of the placeholder volume/price scores
+        self.rng = np.random.default_rng()
+        
+        # One pattern for every tracked symbol, matched as a whole 2-5 letter
+        # word in upper-cased text ('$GME' matches too: '$' is a word boundary)
+        matchable = {s for s in self.tracked_symbols if re.fullmatch(r'[A-Z]{2,5}', s)}
+        self._symbol_re = re.compile(r'\b(' + symbol_pattern(matchable) + r')\b') if matchable else None
+    
+    def get_user_watchlists(self):
+        """Load user watchlists from S3"""
+        try:
+            response = self.s3_client.get_object(
+                Bucket=self.bucket_name,
+                Key="user_data/watchlists.json"
+            )
+            data = json.loads(response['Body'].read().decode('utf-8'))
+            all_stocks = set()
+            for user_data in data["users"].values():
+                all_stocks.update(user_data.get("stocks", []))
+            return list(all_stocks)
+        except:
+            return []
+    
+    def read_object(self, key):
+        """Download one Parquet (newer uploads) or CSV (older) object from S3 as an Arrow table
+
+        Only TREND_COLUMNS present in the object are read; Parquet skips the
+        other column chunks entirely instead of decoding and dropping them.
+        CSV goes through Arrow's multithreaded reader, converting only those columns.
+        """
+        data = self.s3_client.get_object(Bucket=self.bucket_name, Key=key)['Body'].read()
+        if key.endswith('.parquet'):
+            parquet_file = pq.ParquetFile(BytesIO(data))
+            columns = [col for col in TREND_COLUMNS if col in parquet_file.schema_arrow.names]
+            return parquet_file.read(columns=columns)
+        
+        # Arrow rejects include_columns it can't find, so project to the header's names
+        header = next(csv.reader([BytesIO(data).readline().decode('utf-8').rstrip('\r\n')]))
+        return pacsv.read_csv(
+            BytesIO(data),
+            # Post text often spans lines inside quoted fields
+            parse_options=pacsv.ParseOptions(newlines_in_values=True),
+            convert_options=pacsv.ConvertOptions(
+                include_columns=[col for col in TREND_COLUMNS if col in header],
+                # Parse timestamps up front so CSV and Parquet tables share one type;
+                # text stays text even when a file's values all look numeric or are empty
+                column_types={'timestamp': pa.timestamp('ns'), 'title': pa.string(), 'content': pa.string()},
+                strings_can_be_null=True  # empty fields become NaN, as with pandas
+            )
+        )
     
     def load_recent_reddit_data(self, days=7):
         """Load recent Reddit data from S3"""
         try:
-            objects = self.s3_client.list_objects_v2(
+            # LastModified from boto3 is tz-aware UTC, so compare against an aware cutoff
+            cutoff_date = datetime.now(timezone.utc) - timedelta(days=days)
+            
+            # Keys embed a UTC timestamp (reddit_financial_YYYYMMDD_HHMMSS), so start the
+            # listing server-side at the day before the cutoff and page past 1000 keys
+            paginator = self.s3_client.get_paginator('list_objects_v2')
+            pages = paginator.paginate(
                 Bucket=self.bucket_name,
-                Prefix="raw-data/reddit_financial_"
+                Prefix="raw-data/reddit_financial_",
+                StartAfter=f"raw-data/reddit_financial_{cutoff_date - timedelta(days=1):%Y%m%d}"
             )
             
-            if not objects.get('Contents'):
-                return pd.DataFrame()
-            
             # Get recent files (last 7 days)
-            cutoff_date = datetime.now() - timedelta(days=days)
             recent_files = [
-                obj for obj in objects['Contents'] 
-                if obj['LastModified'].replace(tzinfo=None) >= cutoff_date
+                obj
+                for page in pages
+                for obj in page.get('Contents', [])
+                if obj['LastModified'] >= cutoff_date
             ]
             
-            all_data = []
-            for obj in recent_files:
-                response = self.s3_client.get_object(
-                    Bucket=self.bucket_name,
-                    Key=obj['Key']
-                )
-                csv_content = response['Body'].read().decode('utf-8')
-                df = pd.read_csv(StringIO(csv_content))
-                all_data.append(df)
+            if not recent_files:
+                return pd.DataFrame()
+            
+            # Each object is an independent GET, so overlap the network round trips
+            with ThreadPoolExecutor(max_workers=16) as executor:
+                tables = list(executor.map(self.read_object, [obj['Key'] for obj in recent_files]))
             
-            if all_data:
-                combined_df = pd.concat(all_data, ignore_index=True)
+            if tables:
+                # Chunked concat (columns missing from some files are null-filled),
+                # then a single conversion to pandas for all files
+                combined_df = pa.concat_tables(tables, promote_options='permissive').to_pandas()
                 combined_df['timestamp'] = pd.to_datetime(combined_df['timestamp'])
+                if 'sentiment_label' in combined_df.columns:
+                    # int8 codes instead of repeated label strings
+                    combined_df['sentiment_label'] = combined_df['sentiment_label'].astype(SENTIMENT_LABELS)
                 return combined_df
             
             return pd.DataFrame()
@@ -103,97 +179,80 @@ class TrendingDetector:
             return pd.DataFrame()
     
     def extract_symbols_from_text(self, text):
-        """Extract stock/crypto symbols from text using regex"""
-        if not isinstance(text, str):
+        """Extract tracked stock/crypto symbols ($GME or GME) from text"""
+        if not isinstance(text, str) or self._symbol_re is None:
             return []
         
-        # Look for $SYMBOL or SYMBOL patterns
-        patterns = [
-            r'\$([A-Z]{2,5})\b',  # $GME, $BTC
-            r'\b([A-Z]{2,5})\b'   # GME, BTC (standalone)
-        ]
-        
-        symbols = []
-        for pattern in patterns:
-            matches = re.findall(pattern, text.upper())
-            symbols.extend(matches)
-        
-        # Filter to tracked symbols only
-        return [s for s in symbols if s in self.tracked_symbols]
+        return self._symbol_re.findall(text.upper())
     
-    def calculate_mention_baseline(self, df, symbol, days=30):
-        """Calculate baseline mention frequency for a symbol"""
-        if df.empty:
-            return 0
-        
-        # Look for symbol mentions in title and content
-        df['mentions_symbol'] = df.apply(
-            lambda row: symbol in self.extract_symbols_from_text(
-                f"{row.get('title', '')} {row.get('content', '')}"
-            ), axis=1
-        )
-        
-        # Calculate daily mention counts
-        df['date'] = df['timestamp'].dt.date
-        daily_mentions = df[df['mentions_symbol']].groupby('date').size()
-        
-        if len(daily_mentions) == 0:
-            return 0
-        
-        # Return average daily mentions over the period
-        return daily_mentions.mean()
+    def extract_symbols(self, df):
+        """Tracked symbols mentioned in each row's title and content (list per row)"""
+        if self._symbol_re is None:
+            return pd.Series([[]] * len(df), index=df.index, dtype=object)
+        
+        # Join and upper-case the text for all rows at once, then one regex scan per row
+        empty = pd.Series('', index=df.index)
+        text = df.get('title', empty).fillna('').astype(str) + ' ' + df.get('content', empty).fillna('').astype(str)
+        return text.str.upper().str.findall(self._symbol_re)
+    
+    def mentions(self, df, symbol):
+        """Boolean mask of rows whose 'symbols' list includes symbol"""
+        return df['symbols'].map(lambda symbols: symbol in symbols).astype(bool)
     
     def detect_mention_spikes(self, df):
         """Detect unusual mention spikes for tracked symbols"""
         if df.empty:
             return []
         
-        trending_items = []
+        # One row per (post, symbol) pair; a post mentioning a symbol twice counts once
+        exploded = (df[['timestamp', 'symbols']].explode('symbols')
+                    .dropna(subset=['symbols'])
+                    .rename_axis('row').reset_index()
+                    .drop_duplicates(['row', 'symbols']))
+        if exploded['timestamp'].isna().all():
+            return []
         
-        # Get recent data (last 24 hours) vs baseline (last 30 days)
+        # Count mentions with integer codes instead of grouping on object keys:
+        # one bincount per (symbol, day) cell and one per symbol for the last 24h
+        codes, mentioned = pd.factorize(exploded['symbols'])
+        days, _ = pd.factorize(exploded['timestamp'].values.astype('datetime64[D]'))
+        n_symbols, n_days = len(mentioned), days.max() + 1
+        dated = days >= 0  # rows without a timestamp have no day to count in
+        per_day = np.bincount(
+            codes[dated] * n_days + days[dated], minlength=n_symbols * n_days
+        ).reshape(n_symbols, n_days)
+        
+        # Baseline: average daily mentions over the days each symbol was mentioned
+        days_mentioned = (per_day > 0).sum(axis=1)
+        baseline = pd.Series(per_day.sum(axis=1) / np.maximum(days_mentioned, 1), index=mentioned)[days_mentioned > 0]
+        
+        # Recent mentions (last 24 hours)
         recent_cutoff = datetime.now() - timedelta(hours=24)
-        recent_df = df[df['timestamp'] >= recent_cutoff].copy()
-        
-        for symbol in self.tracked_symbols:
-            # Calculate baseline (30-day average)
-            baseline = self.calculate_mention_baseline(df, symbol, days=30)
-            
-            if baseline == 0:
-                continue  # Skip symbols with no historical mentions
-            
-            # Calculate recent mentions (last 24 hours)
-            recent_mentions = 0
-            for _, row in recent_df.iterrows():
-                text = f"{row.get('title', '')} {row.get('content', '')}"
-                if symbol in self.extract_symbols_from_text(text):
-                    recent_mentions += 1
-            
-            # Calculate spike ratio
-            spike_ratio = recent_mentions / max(baseline, 0.1)  # Avoid division by zero
-            
-            if spike_ratio >= 3.0:  # 3x normal mentions = trending
-                trending_items.append({
-                    'symbol': symbol,
-                    'recent_mentions': recent_mentions,
-                    'baseline_mentions': baseline,
-                    'spike_ratio': spike_ratio,
-                    'reddit_score': min(spike_ratio / 10, 1.0),  # Normalize to 0-1
-                    'detected_at': datetime.now()
-                })
-        
-        return trending_items
+        is_recent = (exploded['timestamp'] >= recent_cutoff).to_numpy()
+        recent = pd.Series(np.bincount(codes[is_recent], minlength=n_symbols), index=mentioned)
+        
+        # Symbols with no historical mentions never appear here; keep tracked order
+        symbols = pd.Index(self.tracked_symbols).unique().intersection(baseline.index, sort=False)
+        spikes = pd.DataFrame({
+            'recent_mentions': recent.reindex(symbols),
+            'baseline_mentions': baseline.reindex(symbols)
+        })
+        spikes['spike_ratio'] = spikes['recent_mentions'] / spikes['baseline_mentions'].clip(lower=0.1)  # Avoid division by zero
+        spikes = spikes[spikes['spike_ratio'] >= 3.0]  # 3x normal mentions = trending
+        spikes['reddit_score'] = (spikes['spike_ratio'] / 10).clip(upper=1.0)  # Normalize to 0-1
+        spikes['detected_at'] = datetime.now()
+        
+        return spikes.rename_axis('symbol').reset_index().to_dict('records')
     
-    def get_volume_spike_score(self, symbol):
-        """Get volume spike score (placeholder - would integrate with price data)"""
+    def get_volume_spike_scores(self, symbols):
+        """Get volume spike scores (placeholder - would integrate with price data)"""
         # This would integrate with your existing price data
-        # For now, return random score for demonstration
-        import random
-        return random.uniform(0, 1)
+        # For now, return random scores for demonstration
+        return self.rng.random(len(symbols))
     
-    def get_price_movement_score(self, symbol):
-        """Get price movement score (placeholder)"""
-        import random
-        return random.uniform(0, 1)
+    def get_price_movement_scores(self, symbols):
+        """Get price movement scores (placeholder)"""
+        return self.rng.random(len(symbols))
     
     def get_sentiment_shift_score(self, symbol, df):
         """Calculate sentiment shift score for a symbol"""
@@ -201,17 +260,11 @@ class TrendingDetector:
             return 0
         
         # Filter posts mentioning this symbol
-        symbol_posts = []
-        for _, row in df.iterrows():
-            text = f"{row.get('title', '')} {row.get('content', '')}"
-            if symbol in self.extract_symbols_from_text(text):
-                symbol_posts.append(row)
+        symbol_df = df[self.mentions(df, symbol)]
         
-        if len(symbol_posts) < 5:  # Need minimum posts for sentiment analysis
+        if len(symbol_df) < 5:  # Need minimum posts for sentiment analysis
             return 0
         
-        symbol_df = pd.DataFrame(symbol_posts)
-        
         # Calculate recent vs historical sentiment
         recent_cutoff = datetime.now() - timedelta(hours=24)
         recent_sentiment = symbol_df[symbol_df['timestamp'] >= recent_cutoff]
@@ -222,7 +275,8 @@ class TrendingDetector:
         
         # Calculate bullish percentage
         def calc_bullish_pct(sentiment_df):
-            bullish = sentiment_df['sentiment_label'].isin(['4 stars', '5 stars']).mean()
+            # 4 or 5 stars; codes compare as integers (unknown labels are -1)
+            bullish = (sentiment_df['sentiment_label'].cat.codes >= 3).mean()
             return bullish
         
         recent_bullish = calc_bullish_pct(recent_sentiment)
@@ -231,31 +285,28 @@ class TrendingDetector:
         # Return sentiment shift (positive = more bullish)
         return recent_bullish - historical_bullish
     
-    def calculate_composite_score(self, item, df):
-        """Calculate composite trending score using all signals"""
-        symbol = item['symbol']
+    def calculate_composite_scores(self, spikes, df):
+        """Calculate composite trending scores for all spiking symbols at once"""
+        symbols = spikes['symbol'].tolist()
         
         # Get individual signal scores
-        reddit_score = item['reddit_score']
-        volume_score = self.get_volume_spike_score(symbol)
-        price_score = self.get_price_movement_score(symbol)
-        sentiment_score = max(0, self.get_sentiment_shift_score(symbol, df))  # Only positive sentiment shifts
+        scores = pd.DataFrame({
+            'reddit_score': spikes['reddit_score'].to_numpy(),
+            'volume_score': self.get_volume_spike_scores(symbols),
+            'price_score': self.get_price_movement_scores(symbols),
+            # Only positive sentiment shifts
+            'sentiment_score': [max(0, self.get_sentiment_shift_score(symbol, df)) for symbol in symbols]
+        }, index=spikes.index)
         
         # Calculate weighted composite score
-        composite = (
-            reddit_score * self.signals['reddit_mentions'] +
-            volume_score * self.signals['volume_spike'] +
-            price_score * self.signals['price_movement'] +
-            sentiment_score * self.signals['sentiment_shift']
+        scores['composite_score'] = (
+            scores['reddit_score'] * self.signals['reddit_mentions'] +
+            scores['volume_score'] * self.signals['volume_spike'] +
+            scores['price_score'] * self.signals['price_movement'] +
+            scores['sentiment_score'] * self.signals['sentiment_shift']
         )
         
-        return {
-            'composite_score': composite,
-            'reddit_score': reddit_score,
-            'volume_score': volume_score,
-            'price_score': price_score,
-            'sentiment_score': sentiment_score
-        }
+        return scores
     
     def get_alert_level(self, score):
         """Convert composite score to alert level"""
@@ -290,15 +341,22 @@ class TrendingDetector:
         
         print(f"Analyzing {len(df)} Reddit posts/comments from last 7 days...")
         
+        # Extract symbols once; the per-symbol passes below only check membership
+        df['symbols'] = self.extract_symbols(df)
+        
         # Detect mention spikes
         mention_spikes = self.detect_mention_spikes(df)
         print(f"Found {len(mention_spikes)} symbols with mention spikes")
         
-        # Calculate composite scores for each trending item
+        if not mention_spikes:
+            return []
+        
+        # Calculate composite scores for all trending items together
+        spikes = pd.DataFrame(mention_spikes)
+        all_scores = self.calculate_composite_scores(spikes, df).to_dict('records')
+        
         trending_opportunities = []
-        for item in mention_spikes:
-            scores = self.calculate_composite_score(item, df)
-            
+        for item, scores in zip(mention_spikes, all_scores):
             opportunity = {
                 'symbol': item['symbol'],
                 'composite_score': scores['composite_score'],
@@ -334,10 +392,10 @@ class TrendingDetector:
         
         # Generate filename with timestamp
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"trending_opportunities_{timestamp}.csv"
+        filename = f"trending_opportunities_{timestamp}.parquet"
         
         # Upload to S3
-        success = self.s3_uploader.upload_dataframe(df, filename)
+        success = self.s3_uploader.upload_parquet(df, filename)
         
         if success:
             print(f"✅ Saved {len(opportunities)} trending opportunities to S3: {filename}")
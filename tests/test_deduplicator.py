@@ -0,0 +1,66 @@
+import os
+import sys
+import unittest
+from datetime import datetime, timedelta, timezone
+from io import BytesIO
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.deduplicator import DataDeduplicator
+
+class FakePaginator:
+    """list_objects_v2 over sorted keys, honouring Prefix, StartAfter and MaxItems"""
+    def __init__(self, s3):
+        self.s3 = s3
+    
+    def paginate(self, Bucket, Prefix='', StartAfter='', PaginationConfig=None):
+        keys = [key for key in sorted(self.s3.objects) if key.startswith(Prefix) and key > StartAfter]
+        keys = keys[:(PaginationConfig or {}).get('MaxItems', len(keys))]
+        yield {'Contents': [{'Key': key, 'LastModified': self.s3.modified[key]} for key in keys]}
+
+class FakeS3:
+    def __init__(self):
+        self.objects = {}
+        self.modified = {}
+        self.read_keys = []
+    
+    def add(self, key, ids, modified):
+        buffer = BytesIO()
+        pd.DataFrame({'id': ids}).to_parquet(buffer, index=False)
+        self.objects[key] = buffer.getvalue()
+        self.modified[key] = modified
+    
+    def get_paginator(self, operation):
+        return FakePaginator(self)
+    
+    def get_object(self, Bucket, Key):
+        self.read_keys.append(Key)
+        return {'Body': BytesIO(self.objects[Key])}
+
+class GetExistingIdsTest(unittest.TestCase):
+    def test_lists_scraper_uploads_under_raw_data(self):
+        s3 = FakeS3()
+        now = datetime.now(timezone.utc)
+        # 30 stale uploads sort ahead of the recent ones and would fill MaxItems=20
+        for day in range(40, 10, -1):
+            uploaded = now - timedelta(days=day)
+            s3.add(f"raw-data/reddit_financial_{uploaded:%Y%m%d_%H%M%S}.parquet", [f'old{day}'], uploaded)
+        for hours in (30, 2):
+            uploaded = now - timedelta(hours=hours)
+            s3.add(f"raw-data/reddit_financial_{uploaded:%Y%m%d_%H%M%S}.parquet", [f'reddit{hours}'], uploaded)
+        uploaded = now - timedelta(hours=5)
+        s3.add(f"raw-data/bluesky_financial_{uploaded:%Y%m%d_%H%M%S}.parquet", ['bluesky5'], uploaded)
+        s3.add(f"raw-data/price_data_{uploaded:%Y%m%d_%H%M%S}.parquet", ['price'], uploaded)
+        
+        deduplicator = DataDeduplicator.__new__(DataDeduplicator)
+        deduplicator.s3_client = s3
+        deduplicator.bucket_name = 'test-bucket'
+        
+        self.assertEqual(deduplicator.get_existing_ids(days_back=7), {'reddit30', 'reddit2', 'bluesky5'})
+        # Listings start at the cutoff day, so stale uploads are never downloaded
+        self.assertEqual(len(s3.read_keys), 3)
+        self.assertTrue(all(s3.modified[key] > now - timedelta(days=7) for key in s3.read_keys))
+
+if __name__ == '__main__':
+    unittest.main()
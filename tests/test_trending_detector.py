@@ -0,0 +1,58 @@
+import os
+import sys
+import unittest
+from io import BytesIO
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts'))
+from trending_detector import TrendingDetector
+
+class FakeS3:
+    """Serves get_object from an in-memory dict of key -> bytes"""
+    def __init__(self, objects):
+        self.objects = objects
+    
+    def get_object(self, Bucket, Key):
+        return {'Body': BytesIO(self.objects[Key])}
+
+def detector_with(objects):
+    """TrendingDetector reading from FakeS3 (skips the S3 setup in __init__)"""
+    detector = TrendingDetector.__new__(TrendingDetector)
+    detector.s3_client = FakeS3(objects)
+    detector.bucket_name = 'test-bucket'
+    return detector
+
+class ReadObjectCsvTest(unittest.TestCase):
+    def test_quoted_multiline_content(self):
+        csv_data = (
+            'id,title,content,timestamp,sentiment_label\n'
+            'a1,GME to the moon,"First line\nsecond line, with a comma\n\nfourth line",2024-01-02 03:04:05,5 stars\n'
+            'a2,Plain title,,2024-01-02 04:00:00,1 star\n'
+        ).encode('utf-8')
+        table = detector_with({'raw-data/old.csv': csv_data}).read_object('raw-data/old.csv')
+        
+        df = table.to_pandas()
+        self.assertEqual(list(df.columns), ['title', 'content', 'timestamp', 'sentiment_label'])
+        self.assertEqual(df.loc[0, 'content'], 'First line\nsecond line, with a comma\n\nfourth line')
+        self.assertTrue(df['content'].isna().iloc[1])
+        self.assertEqual(str(df['timestamp'].dtype), 'datetime64[ns]')
+    
+    def test_text_columns_stay_strings(self):
+        csv_data = (
+            'title,content,timestamp\n'
+            '123,,2024-01-02 03:04:05\n'
+            '456,,2024-01-02 04:00:00\n'
+        ).encode('utf-8')
+        table = detector_with({'raw-data/old.csv': csv_data}).read_object('raw-data/old.csv')
+        
+        self.assertEqual(str(table.schema.field('title').type), 'string')
+        self.assertEqual(str(table.schema.field('content').type), 'string')
+        self.assertEqual(table.column('title').to_pylist(), ['123', '456'])
+    
+    def test_missing_text_column(self):
+        csv_data = 'title,timestamp\nHello,2024-01-02 03:04:05\n'.encode('utf-8')
+        table = detector_with({'raw-data/old.csv': csv_data}).read_object('raw-data/old.csv')
+        
+        self.assertEqual(table.column_names, ['title', 'timestamp'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import threading
+import time
+from contextlib import contextmanager
+
+class AIMDController:
+    """Additive-increase / multiplicative-decrease limit on concurrent requests
+
+    Each completed request adds `alpha` to the limit when it finished under
+    `target_latency`; a request that failed with one of `overload_errors`
+    (throttling, server errors) multiplies the limit by `beta`. The limit
+    stays between c_min and c_max, and slot() blocks while it is reached.
+    """
+    def __init__(self, c_min: int = 2, c_max: int = 20, initial: float = None,
+                 alpha: float = 0.5, beta: float = 0.5, target_latency: float = 2.0,
+                 overload_errors: tuple = ()):
+        self.c_min = c_min
+        self.c_max = c_max
+        self.c = float(initial if initial is not None else c_min)
+        self.alpha = alpha
+        self.beta = beta
+        self.target_latency = target_latency
+        self.overload_errors = overload_errors
+        self._in_flight = 0
+        self._cond = threading.Condition()
+
+    def update(self, latency: float, overloaded: bool):
+        """Adjust the concurrency limit from one request's outcome"""
+        with self._cond:
+            if overloaded:
+                self.c = max(self.c_min, self.c * self.beta)
+            elif latency < self.target_latency:
+                self.c = min(self.c_max, self.c + self.alpha)
+                self._cond.notify_all()
+
+    @contextmanager
+    def slot(self):
+        """Hold one request slot, feeding the request's latency and outcome back"""
+        with self._cond:
+            while self._in_flight >= int(self.c):
+                self._cond.wait()
+            self._in_flight += 1
+
+        start = time.monotonic()
+        overloaded = False
+        try:
+            yield
+        except self.overload_errors:
+            overloaded = True
+            raise
+        finally:
+            with self._cond:
+                self._in_flight -= 1
+                self._cond.notify_all()
+            self.update(time.monotonic() - start, overloaded)
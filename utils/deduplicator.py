@@ -5,42 +5,60 @@ Prevents duplicate posts from being processed multiple times
 """
 
 import pandas as pd
-import boto3
-from datetime import datetime, timedelta
+import pyarrow.parquet as pq
+from datetime import datetime, timedelta, timezone
+from io import BytesIO
 import os
+from utils.s3_client import get_s3_client
+from utils.s3_uploader import RAW_DATA_PREFIX
 
 class DataDeduplicator:
     def __init__(self):
-        self.s3_client = boto3.client('s3', region_name=os.getenv('AWS_REGION', 'us-west-2'))
+        self.s3_client = get_s3_client()
         self.bucket_name = os.getenv('S3_BUCKET_NAME')
         
+    def read_ids(self, key):
+        """Read just the id column of one uploaded Parquet or CSV object"""
+        body = self.s3_client.get_object(Bucket=self.bucket_name, Key=key)['Body']
+        if key.endswith('.parquet'):
+            parquet_file = pq.ParquetFile(BytesIO(body.read()))
+            if 'id' not in parquet_file.schema_arrow.names:
+                return []
+            return parquet_file.read(columns=['id']).column('id').to_pylist()
+        
+        df = pd.read_csv(body, usecols=lambda col: col == 'id')
+        return df['id'].tolist() if 'id' in df.columns else []
+    
     def get_existing_ids(self, days_back=7):
         """Get IDs of posts from last N days to avoid duplicates"""
         existing_ids = set()
         
         try:
             # List recent files
-            cutoff_date = datetime.utcnow() - timedelta(days=days_back)
+            cutoff_date = datetime.now(timezone.utc) - timedelta(days=days_back)
             
-            # Check multiple prefixes for different file types
-            prefixes = ['reddit_financial_', 'bluesky_financial_', 'processed-data/']
+            # Check multiple prefixes for different file types; scraper uploads are
+            # stored as raw-data/<source>_financial_YYYYMMDD_HHMMSS.parquet (UTC),
+            # so their listing can start at the cutoff day
+            prefixes = [
+                (f'{RAW_DATA_PREFIX}reddit_financial_', True),
+                (f'{RAW_DATA_PREFIX}bluesky_financial_', True),
+                ('processed-data/', False)
+            ]
             
-            for prefix in prefixes:
+            paginator = self.s3_client.get_paginator('list_objects_v2')
+            for prefix, timestamped in prefixes:
                 try:
-                    response = self.s3_client.list_objects_v2(
-                        Bucket=self.bucket_name,
-                        Prefix=prefix,
-                        MaxKeys=20
-                    )
+                    listing = {'Bucket': self.bucket_name, 'Prefix': prefix}
+                    if timestamped:
+                        listing['StartAfter'] = f"{prefix}{cutoff_date - timedelta(days=1):%Y%m%d}"
+                    pages = paginator.paginate(**listing, PaginationConfig={'MaxItems': 20})
                     
-                    for obj in response.get('Contents', []):
-                        if obj['LastModified'].replace(tzinfo=None) > cutoff_date:
+                    for obj in (obj for page in pages for obj in page.get('Contents', [])):
+                        if obj['LastModified'] > cutoff_date:
                             # Download and extract IDs
                             try:
-                                file_obj = self.s3_client.get_object(Bucket=self.bucket_name, Key=obj['Key'])
-                                df = pd.read_csv(file_obj['Body'])
-                                if 'id' in df.columns:
-                                    existing_ids.update(df['id'].tolist())
+                                existing_ids.update(self.read_ids(obj['Key']))
                             except:
                                 # Silently skip files we can't access
                                 continue
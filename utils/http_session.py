@@ -0,0 +1,49 @@
+import orjson
+import requests
+from requests.adapters import HTTPAdapter
+from requests_cache import DO_NOT_CACHE, CachedSession
+from urllib3.util import make_headers
+from urllib3.util.retry import Retry
+
+def create_session(pool_connections: int = 16, pool_maxsize: int = 32, expire_after=None,
+                   urls_expire_after: dict = None) -> requests.Session:
+    """Create a requests Session with keep-alive connection pooling and retries
+
+    When expire_after is given, GET responses are cached on disk for that long
+    and shared between runs (and between scripts on the same machine).
+    urls_expire_after sets per-host/URL-pattern lifetimes instead; with only
+    that given, other URLs are not cached. Once an entry expires, a response
+    that carried ETag/Last-Modified is revalidated with a conditional GET
+    (If-None-Match / If-Modified-Since) and reused on 304 Not Modified.
+    """
+    if expire_after is not None or urls_expire_after:
+        session = CachedSession(
+            'data_harvester_http',
+            backend='sqlite',
+            use_cache_dir=True,
+            expire_after=expire_after if expire_after is not None else DO_NOT_CACHE,
+            urls_expire_after=urls_expire_after
+        )
+    else:
+        session = requests.Session()
+
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        max_retries=Retry(
+            total=3,
+            backoff_factor=0.3,
+            status_forcelist=[429, 500, 502, 503, 504],
+            # Hand the final error response back so callers can inspect it
+            raise_on_status=False
+        )
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    # Advertise every encoding urllib3 can decode (gzip, deflate, br with brotli installed)
+    session.headers.update(make_headers(accept_encoding=True))
+    return session
+
+def parse_json(response: requests.Response):
+    """Decode a JSON response body with orjson (faster than response.json())"""
+    return orjson.loads(response.content)
@@ -0,0 +1,32 @@
+import pandas as pd
+
+# Star-rating sentiment labels in score order (category code + 1 = stars)
+SENTIMENT_LABELS = pd.CategoricalDtype(
+    ['1 star', '2 stars', '3 stars', '4 stars', '5 stars'], ordered=True
+)
+
+def optimize_memory(df: pd.DataFrame, dtypes: dict = None, category_threshold: float = 0.5) -> pd.DataFrame:
+    """Downcast numeric columns and store low-cardinality strings as category
+
+    Columns listed in dtypes are cast to that dtype as-is (use this where a
+    stable schema across uploads matters); the rest are downcast automatically.
+    """
+    if df.empty:
+        return df
+
+    dtypes = {col: dtype for col, dtype in (dtypes or {}).items() if col in df.columns}
+    if dtypes:
+        df = df.astype(dtypes)
+
+    for col in df.select_dtypes(include='integer').columns.difference(list(dtypes)):
+        downcast = 'unsigned' if (df[col] >= 0).all() else 'integer'
+        df[col] = pd.to_numeric(df[col], downcast=downcast)
+
+    for col in df.select_dtypes(include='float').columns.difference(list(dtypes)):
+        df[col] = pd.to_numeric(df[col], downcast='float')
+
+    for col in df.select_dtypes(include='object').columns.difference(list(dtypes)):
+        if df[col].nunique() / len(df) < category_threshold:
+            df[col] = df[col].astype('category')
+
+    return df
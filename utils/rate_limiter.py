@@ -0,0 +1,30 @@
+import threading
+import time
+
+class TokenBucket:
+    """Thread-safe token-bucket rate limiter
+
+    Allows bursts of up to `capacity` requests, refilled at `rate` tokens per
+    second; acquire() only sleeps once the burst budget is spent.
+    """
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take one token, sleeping until one is available"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.rate)
+            self._last_refill = now
+
+            # Reserve the token now and sleep off the deficit outside the lock,
+            # so concurrent callers queue up behind each other in order
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+
+        if wait:
+            time.sleep(wait)
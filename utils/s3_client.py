@@ -0,0 +1,22 @@
+import os
+from functools import lru_cache
+
+import boto3
+from botocore.config import Config
+
+# Sized above the largest download pool (16 workers) plus multipart upload
+# threads, so parallel requests never queue for a connection
+S3_CLIENT_CONFIG = Config(
+    max_pool_connections=64,
+    retries={'mode': 'adaptive', 'max_attempts': 5},
+    tcp_keepalive=True
+)
+
+@lru_cache(maxsize=None)
+def get_s3_client():
+    """Process-wide S3 client (boto3 clients are thread-safe), created on first use
+
+    Sharing one client lets every uploader, reader and deduplicator reuse the
+    same pool of kept-alive connections instead of each opening its own.
+    """
+    return boto3.client('s3', region_name=os.getenv('AWS_REGION'), config=S3_CLIENT_CONFIG)
@@ -1,19 +1,28 @@
-import boto3
+from boto3.s3.transfer import TransferConfig
 import json
+import orjson
+from io import BytesIO
 from datetime import datetime
 from typing import Dict, Any
 import os
+from utils.s3_client import get_s3_client
+
+# Objects above 8 MB (e.g. historical backfills) go up as parallel multipart parts
+TRANSFER_CONFIG = TransferConfig(multipart_threshold=8 * 1024 * 1024, max_concurrency=8)
+
+# Every upload is stored under this prefix (raw-data/<filename> or raw-data/<source>/...)
+RAW_DATA_PREFIX = 'raw-data/'
 
 class S3Uploader:
     def __init__(self):
-        self.s3_client = boto3.client('s3')
+        self.s3_client = get_s3_client()
         self.bucket_name = os.getenv('S3_BUCKET_NAME')
     
     def upload_data(self, data: Dict[Any, Any], source: str) -> bool:
         """Upload scraped data to S3 with timestamp and source info"""
         try:
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            key = f"raw-data/{source}/{timestamp}.json"
+            key = f"{RAW_DATA_PREFIX}{source}/{timestamp}.json"
             
             self.s3_client.put_object(
                 Bucket=self.bucket_name,
@@ -27,17 +36,63 @@ class S3Uploader:
             print(f"Upload failed: {e}")
             return False
     
-    def upload_dataframe(self, df, filename: str) -> bool:
-        """Upload pandas DataFrame as CSV to S3"""
+    def upload_json(self, obj, filename: str) -> bool:
+        """Upload a single JSON-serializable record to S3 (no DataFrame needed)"""
         try:
-            key = f"raw-data/{filename}"
-            csv_buffer = df.to_csv(index=False)
+            key = f"{RAW_DATA_PREFIX}{filename}"
             
             self.s3_client.put_object(
                 Bucket=self.bucket_name,
                 Key=key,
-                Body=csv_buffer,
-                ContentType='text/csv'
+                Body=orjson.dumps(obj),
+                ContentType='application/json'
+            )
+            print(f"Data uploaded to s3://{self.bucket_name}/{key}")
+            return True
+        except Exception as e:
+            print(f"Upload failed: {e}")
+            return False
+    
+    def upload_dataframe(self, df, filename: str) -> bool:
+        """Upload pandas DataFrame as CSV to S3
+
+        No collector calls this any more (they upload parquet); kept as public API.
+        """
+        try:
+            key = f"{RAW_DATA_PREFIX}{filename}"
+            # Write encoded bytes straight into the buffer instead of building a str first
+            csv_buffer = BytesIO()
+            df.to_csv(csv_buffer, index=False, encoding='utf-8')
+            csv_buffer.seek(0)
+            
+            self.s3_client.upload_fileobj(
+                csv_buffer,
+                self.bucket_name,
+                key,
+                ExtraArgs={'ContentType': 'text/csv'},
+                Config=TRANSFER_CONFIG
+            )
+            print(f"Data uploaded to s3://{self.bucket_name}/{key}")
+            return True
+        except Exception as e:
+            print(f"Upload failed: {e}")
+            return False
+    
+    def upload_parquet(self, df, filename: str) -> bool:
+        """Upload pandas DataFrame as zstd-compressed Parquet to S3"""
+        try:
+            key = f"{RAW_DATA_PREFIX}{filename}"
+            parquet_buffer = BytesIO()
+            df.to_parquet(parquet_buffer, engine='pyarrow', compression='zstd', index=False)
+            parquet_buffer.seek(0)
+            
+            # Stream the buffer itself rather than a getvalue() copy of it
+            self.s3_client.upload_fileobj(
+                parquet_buffer,
+                self.bucket_name,
+                key,
+                ExtraArgs={'ContentType': 'application/vnd.apache.parquet'},
+                Config=TRANSFER_CONFIG
             )
             print(f"Data uploaded to s3://{self.bucket_name}/{key}")
             return True